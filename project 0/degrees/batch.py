@@ -0,0 +1,201 @@
+"""
+Answers many degrees queries with one loaded graph.
+
+Reads tab-separated "source<TAB>target" name pairs from a file or stdin
+and writes one JSON object per query to stdout, in input order.
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import sys
+import time
+from collections import OrderedDict
+
+import degrees
+
+
+class TreeCache():
+    """
+    Keeps the breadth-first search trees of the most recent sources, so
+    queries that share a source reuse one full search.
+    """
+
+    def __init__(self, graph, size):
+        self.graph = graph
+        self.size = size
+        self.trees = OrderedDict()
+
+    def path(self, source, target):
+        """
+        Returns the (movie_id, person_id) path between two person indexes,
+        or None if they are not connected.
+        """
+        graph = self.graph
+        if self.size == 0:
+            parent, via = graph.search(source, target)
+        elif source in self.trees:
+            self.trees.move_to_end(source)
+            parent, via = self.trees[source]
+        else:
+            parent, via = self.trees[source] = graph.search(source)
+            if len(self.trees) > self.size:
+                self.trees.popitem(last=False)
+
+        if parent[target] == -1:
+            return None
+        return graph.path(parent, via, source, target)
+
+
+def resolve(graph, name, fuzzy=False):
+    """
+    Returns (person index, error) for a name, never prompting:
+    unknown and ambiguous names come back as an error message.
+
+    With fuzzy, names without an exact match resolve to the closest
+    candidate of the name index when it is the only closest one.
+    """
+    found = graph.people_named(name)
+    if len(found) == 1:
+        return found[0], None
+    if found:
+        candidates = ", ".join(
+            f"{graph.person_ids[person]} (born {graph.person_births[person]})" for person in found
+        )
+        return None, f"ambiguous name, candidates: {candidates}"
+    if not fuzzy:
+        return None, "person not found"
+
+    candidates = degrees.candidates_for_name(name, limit=5)
+    if not candidates:
+        return None, "person not found"
+    if len(candidates) == 1 or candidates[0]["distance"] < candidates[1]["distance"]:
+        return graph.person_index[candidates[0]["person_id"]], None
+    suggestions = ", ".join(
+        f"{candidate['name']} ({candidate['person_id']}, born {candidate['birth']})"
+        for candidate in candidates
+    )
+    return None, f"person not found, did you mean: {suggestions}"
+
+
+def answer(graph, trees, line, fuzzy=False):
+    """
+    Returns the JSON result for one query line.
+    """
+    fields = line.rstrip("\r\n").split("\t")
+    if len(fields) != 2:
+        return {"query": line.rstrip("\r\n"), "error": "expected source<TAB>target"}
+    source_name, target_name = fields
+    record = {"source": source_name, "target": target_name}
+
+    source, error = resolve(graph, source_name, fuzzy)
+    if error is not None:
+        record["error"] = f"source: {error}"
+        return record
+    target, error = resolve(graph, target_name, fuzzy)
+    if error is not None:
+        record["error"] = f"target: {error}"
+        return record
+
+    if fuzzy:
+        record["source_id"] = graph.person_ids[source]
+        record["target_id"] = graph.person_ids[target]
+
+    path = trees.path(source, target)
+    if path is None:
+        record["degrees"] = None
+        record["path"] = None
+        return record
+
+    record["degrees"] = len(path)
+    record["path"] = [
+        {
+            "movie_id": movie_id,
+            "movie": graph.movie_titles[graph.movie_index[movie_id]],
+            "person_id": person_id,
+            "person": graph.person_names[graph.person_index[person_id]],
+        }
+        for movie_id, person_id in path
+    ]
+    return record
+
+
+# Set in the parent before the pool forks, so workers inherit the graph
+# copy-on-write (and the snapshot pages through the shared mapping)
+# instead of receiving a pickled copy.
+_worker_trees = None
+_worker_fuzzy = False
+
+
+def _answer_in_worker(line):
+    return json.dumps(answer(_worker_trees.graph, _worker_trees, line, _worker_fuzzy))
+
+
+def answer_all(graph, trees, lines, workers, fuzzy=False):
+    """
+    Yields the JSON result line of each query line, in input order,
+    spreading the searches over a pool of worker processes.
+    """
+    global _worker_trees, _worker_fuzzy
+    if workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        # workers share the loaded graph by forking, which Windows cannot do
+        print("Forked workers are not available here, answering queries in this process.",
+              file=sys.stderr)
+        workers = 1
+    if workers <= 1:
+        for line in lines:
+            yield json.dumps(answer(graph, trees, line, fuzzy))
+        return
+
+    # build the lazy lookup tables once here rather than once per worker,
+    # and keep the collector from touching (and so copying) inherited pages
+    graph.person_index, graph.movie_index, graph.name_order
+    if fuzzy:
+        degrees.candidates_for_name("")
+    gc.freeze()
+
+    _worker_trees = trees
+    _worker_fuzzy = fuzzy
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers) as pool:
+        # imap keeps input order while letting workers run ahead
+        yield from pool.imap(_answer_in_worker, lines, chunksize=64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer degrees queries in bulk.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("queries", nargs="?", default="-",
+                        help="file of source<TAB>target lines, - for stdin")
+    parser.add_argument("--trees", type=int, default=0, metavar="N",
+                        help="reuse full search trees of the N most recent sources")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="answer queries in N forked worker processes")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="resolve misspelled or partial names to their closest match")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    degrees.load_data(args.directory)
+    graph = degrees.graph
+    print(f"Data loaded in {time.perf_counter() - start:.3f}s.", file=sys.stderr)
+
+    trees = TreeCache(graph, args.trees)
+    queries = sys.stdin if args.queries == "-" else open(args.queries, encoding="utf-8")
+
+    count = 0
+    start = time.perf_counter()
+    with queries:
+        lines = (line for line in queries if line.strip())
+        for result in answer_all(graph, trees, lines, args.workers, args.fuzzy):
+            print(result)
+            count += 1
+    elapsed = time.perf_counter() - start
+
+    rate = count / elapsed if elapsed else float("inf")
+    print(f"{count} queries in {elapsed:.3f}s ({rate:.1f} queries/s).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmark for degrees loading and search on synthetic datasets.
+
+Generates people/movies/stars CSV files of a given number of star rows,
+casting people with a power-law popularity so a few people star in many
+movies and most in only one or two, like the real IMDb data. Then, in a
+fresh process per dataset, measures cold (CSV) and warm (snapshot) load
+time, peak RSS, and per-strategy query latency and people expanded.
+
+Results are printed as one JSON object per dataset.
+
+Usage: python benchmark.py [--edges N [N ...]] [--queries Q] [--output FILE]
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from bisect import bisect
+from itertools import accumulate
+
+
+def generate(directory, edges, people=None, movies=None, alpha=1.0, seed=0):
+    """
+    Writes a synthetic dataset with about edges star rows into directory.
+    Person popularity follows a Zipf law with exponent alpha.
+    """
+    people = people or max(2, edges // 3)
+    movies = movies or max(1, edges // 6)
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(people):
+            writer.writerow([person, f"Person {person}", 1900 + rng.randrange(120)])
+
+    with open(os.path.join(directory, "movies.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(movies):
+            writer.writerow([movie, f"Movie {movie}", 1900 + rng.randrange(125)])
+
+    # popular people are spread over the id range, not bunched at the start
+    popularity = list(range(people))
+    rng.shuffle(popularity)
+    weights = list(accumulate(1 / (rank + 1) ** alpha for rank in range(people)))
+    total = weights[-1]
+
+    with open(os.path.join(directory, "stars.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for _ in range(edges):
+            person = popularity[bisect(weights, rng.random() * total)]
+            writer.writerow([person, rng.randrange(movies)])
+
+
+def percentile(values, fraction):
+    """
+    Returns the value below which the given fraction of values fall.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def measure(directory, strategies, queries, seed):
+    """
+    Loads directory and runs the query workload, returns the results.
+    Meant to run in a fresh process so peak RSS belongs to this dataset.
+    """
+    import degrees
+    import ingest
+    import snapshot
+
+    result = {}
+
+    start = time.perf_counter()
+    degrees.load_data(directory)
+    result["cold_load_seconds"] = time.perf_counter() - start
+    result["peak_rss_bytes"] = ingest.peak_rss()
+
+    start = time.perf_counter()
+    snapshot.load(directory)
+    result["warm_load_seconds"] = time.perf_counter() - start
+
+    graph = degrees.graph
+    result["people"] = len(graph.person_ids)
+    result["movies"] = len(graph.movie_ids)
+    result["stars"] = len(graph.person_movies)
+
+    if "alt" in strategies:
+        start = time.perf_counter()
+        degrees.load_index(directory)
+        result["index_seconds"] = time.perf_counter() - start
+
+    # people without any movie would only measure the "not connected" fast path
+    rng = random.Random(seed)
+    offsets = graph.person_offsets
+    cast = [graph.person_ids[p] for p in range(len(graph)) if offsets[p + 1] > offsets[p]]
+    pairs = [(rng.choice(cast), rng.choice(cast)) for _ in range(queries)]
+
+    result["strategies"] = {}
+    for name in strategies:
+        search = degrees.STRATEGIES[name]
+        latencies = []
+        explored = []
+        found = 0
+        for source, target in pairs:
+            start = time.perf_counter()
+            path = search(source, target)
+            latencies.append(time.perf_counter() - start)
+            explored.append(degrees.num_explored)
+            found += path is not None
+        result["strategies"][name] = {
+            "queries": len(pairs),
+            "connected": found,
+            "p50_seconds": percentile(latencies, 0.50),
+            "p99_seconds": percentile(latencies, 0.99),
+            "mean_explored": sum(explored) / len(explored) if explored else None,
+            "p99_explored": percentile(explored, 0.99),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees on synthetic data.")
+    parser.add_argument("--edges", type=int, nargs="+", default=[10000, 100000],
+                        help="star rows of each generated dataset")
+    parser.add_argument("--alpha", type=float, default=1.0,
+                        help="power-law exponent of casting popularity")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--strategies", nargs="+", default=["bfs", "bidirectional", "csr", "alt"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", metavar="DIRECTORY",
+                        help="generate datasets here and keep them")
+    parser.add_argument("--output", help="write JSON lines here instead of stdout")
+    args = parser.parse_args()
+
+    import degrees
+    unknown = set(args.strategies) - set(degrees.STRATEGIES)
+    if unknown:
+        sys.exit(f"Unknown strategies: {', '.join(sorted(unknown))}")
+
+    root = args.keep or tempfile.mkdtemp(prefix="degrees-benchmark-")
+    output = open(args.output, "w") if args.output else sys.stdout
+    context = multiprocessing.get_context("spawn")
+    try:
+        for edges in args.edges:
+            directory = os.path.join(root, f"edges-{edges}")
+            start = time.perf_counter()
+            generate(directory, edges, alpha=args.alpha, seed=args.seed)
+            generated = time.perf_counter() - start
+
+            with context.Pool(1) as pool:
+                result = pool.apply(measure, (directory, args.strategies, args.queries, args.seed))
+            record = {"edges": edges, "alpha": args.alpha, "seed": args.seed,
+                      "generate_seconds": generated, **result}
+            print(json.dumps(record), file=output, flush=True)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
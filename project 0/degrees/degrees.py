@@ -1,7 +1,11 @@
-import csv
 import sys
+from collections import deque
 
-from util import Node, StackFrontier, QueueFrontier
+import ingest
+import landmarks
+import snapshot
+from graph import Graph, MoviesView, NamesView, PeopleView
+from nameindex import NameIndex
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,54 +16,60 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Integer indexed CSR copy of people and movies
+graph = None
+
+# Landmark distances over graph, loaded for the alt strategy
+index = None
+
+# Prefix and fuzzy name lookup over graph, built on first use
+name_index = None
+
+# Number of people expanded by the last search
+num_explored = 0
+
 
 def load_data(directory):
     """
     Load data from CSV files into memory.
+
+    The CSV files are streamed into a compact graph that is saved as a
+    binary snapshot next to them. While the CSV files are unchanged,
+    later runs memory-map that snapshot instead of parsing anything.
+    Either way people, movies and names become read-only views over it.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    global graph, people, movies, names, name_index
+
+    graph = snapshot.load(directory)
+    if graph is None:
+        graph = ingest.load_graph(directory)
+        try:
+            snapshot.save(graph, directory)
+        except OSError:
+            pass  # read-only dataset, just parse the CSV files next time
+        else:
+            # swap the freshly built arrays for the lazily paged in snapshot
+            graph = snapshot.load(directory) or graph
+
+    people = PeopleView(graph)
+    movies = MoviesView(graph)
+    names = NamesView(graph)
+    name_index = None
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python degrees.py [directory] [strategy]")
+    directory = sys.argv[1] if len(sys.argv) >= 2 else "large"
+    strategy = sys.argv[2] if len(sys.argv) == 3 else "csr"
+    if strategy not in STRATEGIES:
+        sys.exit(f"Unknown strategy, choose from: {', '.join(STRATEGIES)}")
 
     # Load data from files into memory
     print("Loading data...")
     load_data(directory)
+    if strategy == "alt":
+        load_index(directory)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,7 +79,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = STRATEGIES[strategy](source, target)
 
     if path is None:
         print("Not connected.")
@@ -91,30 +101,185 @@ def shortest_path(source, target):
 
     If no possible path, returns None.
     """
+    global num_explored
+    num_explored = 0
 
-    frontier = QueueFrontier()
-    frontier.add(Node(source, None, None))
-    
-    explored = set()
-    while not frontier.empty():
+    # person_id -> (movie_id, person_id it was reached from), instead of a
+    # chain of Node objects, and a queue of bare person_ids
+    parents = {source: None}
+    frontier = deque([source])
+    while frontier:
 
-        node = frontier.remove()
-        if node.state==target:
+        person_id = frontier.popleft()
+        num_explored += 1
+        if person_id == target:
             # backtrack solution
             path = []
-            while node.parent!=None:
-                path.append((node.action, node.state))
-                node = node.parent
+            while parents[person_id] is not None:
+                movie_id, parent = parents[person_id]
+                path.append((movie_id, person_id))
+                person_id = parent
 
             path.reverse()
             return path
 
-        for action, state in neighbors_for_person(node.state):
-            if state not in explored:
-                explored.add(state)
-                frontier.add(Node(state, node, action))
+        for movie_id, neighbor in neighbors_for_person(person_id):
+            if neighbor not in parents:
+                parents[neighbor] = (movie_id, person_id)
+                frontier.append(neighbor)
+
+    return None
+
+
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from both ends at once and stopping where the two searches meet.
+
+    If no possible path, returns None.
+    """
+    global num_explored
+    num_explored = 0
+    if source == target:
+        return []
+
+    # person_id -> (movie_id, person_id one step closer to that side's root)
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+
+        # always grow the smaller layer, it is the cheaper one to expand
+        expand_forward = len(forward_layer) <= len(backward_layer)
+        if expand_forward:
+            layer, parents, others = forward_layer, forward, backward
+        else:
+            layer, parents, others = backward_layer, backward, forward
+
+        # finish the whole layer so the best meeting point wins, not the first
+        best = None
+        next_layer = []
+        num_explored += len(layer)
+        for person_id in layer:
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor in others:
+                    length = _depth(parents, person_id) + _depth(others, neighbor)
+                    if best is None or length < best[0]:
+                        best = (length, person_id, movie_id, neighbor)
+                if neighbor not in parents:
+                    parents[neighbor] = (movie_id, person_id)
+                    next_layer.append(neighbor)
+
+        if best is not None:
+            _, person_id, movie_id, neighbor = best
+            if expand_forward:
+                return _join_paths(forward, backward, person_id, movie_id, neighbor)
+            return _join_paths(forward, backward, neighbor, movie_id, person_id)
+
+        if expand_forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+
+    return None
+
+
+def _depth(parents, person_id):
+    """
+    Returns the number of steps from person_id back to the root of parents.
+    """
+    depth = 0
+    while parents[person_id] is not None:
+        person_id = parents[person_id][1]
+        depth += 1
+    return depth
+
+
+def _join_paths(forward, backward, left, movie_id, right):
+    """
+    Builds the source to target path through the edge left -> right,
+    where left was reached from the source and right from the target.
+    """
+    path = []
+    person_id = left
+    while forward[person_id] is not None:
+        parent_movie, parent = forward[person_id]
+        path.append((parent_movie, person_id))
+        person_id = parent
+    path.reverse()
+
+    path.append((movie_id, right))
+    person_id = right
+    while backward[person_id] is not None:
+        parent_movie, parent = backward[person_id]
+        path.append((parent_movie, parent))
+        person_id = parent
 
-    return 
+    return path
+
+
+def csr_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching the
+    compact integer graph instead of the people/movies dicts.
+
+    If no possible path, returns None.
+    """
+    global graph, num_explored
+    if graph is None:
+        graph = Graph.from_data(people, movies)
+    path = graph.shortest_path(source, target)
+    num_explored = graph.num_explored
+    return path
+
+
+def load_index(directory, k=16):
+    """
+    Loads the landmark index of directory, building and saving
+    one with k landmarks if it is missing or out of date.
+    """
+    global index
+    index = landmarks.load(directory)
+    if index is None:
+        index = landmarks.LandmarkIndex.build(graph, k)
+        try:
+            landmarks.save(index, directory)
+        except OSError:
+            pass
+
+
+def alt_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using A* search with
+    landmark distance bounds as the heuristic.
+
+    If no possible path, returns None.
+    """
+    global num_explored
+    path = index.shortest_path(graph, source, target)
+    num_explored = graph.num_explored
+    return path
+
+
+def degree_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation
+    between two person ids without searching, from the landmark index.
+    """
+    return index.bounds(graph.person_index[source], graph.person_index[target])
+
+
+STRATEGIES = {
+    "bfs": shortest_path,
+    "bidirectional": bidirectional_shortest_path,
+    "csr": csr_shortest_path,
+    "alt": alt_shortest_path,
+}
 
 
 def person_id_for_name(name):
@@ -143,11 +308,33 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def candidates_for_name(name, limit=10):
+    """
+    Returns up to limit ranked candidates for a possibly misspelled or
+    partial name, as dicts of person_id, name, birth and distance.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(graph)
+    return name_index.lookup(name, limit)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        # walk the CSR arrays instead of building a dict per person and movie
+        person_ids = graph.person_ids
+        movie_ids = graph.movie_ids
+        neighbors = set()
+        for movie in graph.movies_of(graph.person_index[person_id]):
+            movie_id = movie_ids[movie]
+            for star in graph.stars_of(movie):
+                neighbors.add((movie_id, person_ids[star]))
+        return neighbors
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -0,0 +1,322 @@
+"""
+Compact star graph for degrees.
+
+People and movies are numbered 0..n-1 and the person -> movie and
+movie -> person edges are stored as compressed sparse row (CSR) arrays:
+the movies of person p are movies[person_offsets[p]:person_offsets[p + 1]],
+and likewise for the stars of a movie. Each edge costs 4 bytes per
+direction instead of a set entry holding a string.
+
+Any of the per-index tables may be lists or read-only sequences such as
+the memory-mapped tables of a snapshot.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+
+class Graph():
+
+    def __init__(self, person_ids, movie_ids,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_names=None, person_births=None,
+                 movie_titles=None, movie_years=None, name_order=None,
+                 person_index=None, movie_index=None):
+        # index -> IMDB id
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+        # index -> name, birth, title, year
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+
+        # person indexes sorted by lowercased name and the IMDB id -> index
+        # maps, computed on first use unless given
+        self._name_order = name_order
+        self._person_index = person_index
+        self._movie_index = movie_index
+
+        self.num_explored = 0
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Builds a graph from the people and movies dicts filled by load_data.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+
+        person_offsets = array("i", [0])
+        person_movies = array("i")
+        person_names = []
+        person_births = []
+        for person_id in person_ids:
+            person = people[person_id]
+            person_movies.extend(movie_index[movie_id] for movie_id in person["movies"])
+            person_offsets.append(len(person_movies))
+            person_names.append(person["name"])
+            person_births.append(person["birth"])
+
+        movie_offsets = array("i", [0])
+        movie_stars = array("i")
+        movie_titles = []
+        movie_years = []
+        for movie_id in movie_ids:
+            movie_stars.extend(person_index[person_id] for person_id in movies[movie_id]["stars"])
+            movie_offsets.append(len(movie_stars))
+            movie_titles.append(movies[movie_id]["title"])
+            movie_years.append(movies[movie_id]["year"])
+
+        return cls(person_ids, movie_ids,
+                   person_offsets, person_movies, movie_offsets, movie_stars,
+                   person_names, person_births, movie_titles, movie_years)
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    @property
+    def person_index(self):
+        """
+        Maps IMDB person ids to person indexes.
+        """
+        if self._person_index is None:
+            self._person_index = {person_id: i for i, person_id in enumerate(self.person_ids)}
+        return self._person_index
+
+    @property
+    def movie_index(self):
+        """
+        Maps IMDB movie ids to movie indexes.
+        """
+        if self._movie_index is None:
+            self._movie_index = {movie_id: i for i, movie_id in enumerate(self.movie_ids)}
+        return self._movie_index
+
+    @property
+    def name_order(self):
+        """
+        Person indexes sorted by lowercased name.
+        """
+        if self._name_order is None:
+            names = self.person_names
+            self._name_order = array("i", sorted(range(len(names)), key=lambda p: names[p].lower()))
+        return self._name_order
+
+    def people_named(self, name):
+        """
+        Returns the person indexes whose lowercased name equals name.
+        """
+        name = name.lower()
+        names = self.person_names
+        order = self.name_order
+        key = lambda p: names[p].lower()
+
+        found = []
+        i = bisect_left(order, name, key=key)
+        while i < len(order) and key(order[i]) == name:
+            found.append(order[i])
+            i += 1
+        return found
+
+    def movies_of(self, person):
+        """
+        Returns the movie indexes of a person index.
+        """
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indexes of a movie index.
+        """
+        return self.movie_stars[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, both given as IMDB ids.
+
+        If no possible path, returns None.
+        """
+        source = self.person_index[source]
+        target = self.person_index[target]
+        parent, via = self.search(source, target)
+        if parent[target] == -1:
+            return None
+        return self.path(parent, via, source, target)
+
+    def search(self, source, target=-1):
+        """
+        Runs a breadth-first search from the source index, stopping early
+        once target is reached. Returns (parent, via) arrays where
+        parent[p] is the person p was reached from (-1 if never reached)
+        and via[p] the movie that links them.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+
+        parent = array("i", [-1]) * len(self.person_ids)
+        via = array("i", [-1]) * len(self.person_ids)
+        # a movie only needs its cast scanned the first time it is reached
+        movie_seen = bytearray(len(self.movie_ids))
+
+        queue = array("i", [source])
+        parent[source] = source
+        head = 0
+        while head < len(queue):
+            person = queue[head]
+            head += 1
+            if person == target:
+                break
+
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if movie_seen[movie]:
+                    continue
+                movie_seen[movie] = 1
+
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if parent[star] == -1:
+                        parent[star] = person
+                        via[star] = movie
+                        queue.append(star)
+
+        self.num_explored = head
+        return parent, via
+
+    def distances(self, source):
+        """
+        Returns an array with the number of degrees between the source
+        index and every person index, -1 for people it cannot reach.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+
+        distance = array("i", [-1]) * len(self.person_ids)
+        movie_seen = bytearray(len(self.movie_ids))
+
+        queue = array("i", [source])
+        distance[source] = 0
+        head = 0
+        while head < len(queue):
+            person = queue[head]
+            head += 1
+            step = distance[person] + 1
+
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if movie_seen[movie]:
+                    continue
+                movie_seen[movie] = 1
+
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if distance[star] == -1:
+                        distance[star] = step
+                        queue.append(star)
+
+        self.num_explored = head
+        return distance
+
+    def path(self, parent, via, source, target):
+        """
+        Walks the parent array back from target and returns the
+        (movie_id, person_id) pairs from source to target.
+        """
+        path = []
+        person = target
+        while person != source:
+            path.append((self.movie_ids[via[person]], self.person_ids[person]))
+            person = parent[person]
+        path.reverse()
+        return path
+
+
+class PeopleView(Mapping):
+    """
+    Read-only stand-in for the people dict, backed by a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[movie] for movie in graph.movies_of(person)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only stand-in for the movies dict, backed by a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index[movie_id]
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[person] for person in graph.stars_of(movie)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only stand-in for the names dict, backed by a Graph.
+    Lookups binary search the graph's name order instead of hashing.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        found = self.graph.people_named(name)
+        if not found:
+            raise KeyError(name)
+        return {self.graph.person_ids[person] for person in found}
+
+    def __iter__(self):
+        names = self.graph.person_names
+        previous = None
+        for person in self.graph.name_order:
+            name = names[person].lower()
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
@@ -0,0 +1,172 @@
+"""
+Streaming, low-memory CSV ingestion for degrees.
+
+Rows are never kept as dicts: people and movies are numbered as they
+are read, their ids, names, births, titles and years go straight into
+compact string tables, and stars.csv is read a row at a time into two
+flat int arrays that are then counting-sorted into the CSR arrays of a
+Graph. Besides the adjacency itself only the id -> index maps stay in
+memory.
+
+Usage: python ingest.py [directory]
+"""
+
+import csv
+import sys
+import time
+from array import array
+
+from graph import Graph
+from snapshot import StringTable
+
+
+class TableWriter():
+    """
+    Appends strings to an offsets array and a utf-8 blob,
+    the layout read back by snapshot.StringTable.
+    """
+
+    def __init__(self):
+        self.offsets = array("i", [0])
+        self.blob = bytearray()
+
+    def append(self, value):
+        self.blob += value.encode("utf-8")
+        self.offsets.append(len(self.blob))
+
+    def table(self):
+        return StringTable(self.offsets, self.blob)
+
+
+def load_graph(directory):
+    """
+    Streams the CSV files of directory into a Graph whose
+    name, birth, title and year tables are StringTables.
+    """
+    person_index = {}
+    person_ids = TableWriter()
+    person_names = TableWriter()
+    person_births = TableWriter()
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        id_, name, birth = (columns.index(column) for column in ("id", "name", "birth"))
+        for row in reader:
+            if row[id_] in person_index:
+                continue
+            person_index[sys.intern(row[id_])] = len(person_index)
+            person_ids.append(row[id_])
+            person_names.append(row[name])
+            person_births.append(row[birth])
+
+    movie_index = {}
+    movie_ids = TableWriter()
+    movie_titles = TableWriter()
+    movie_years = TableWriter()
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        id_, title, year = (columns.index(column) for column in ("id", "title", "year"))
+        for row in reader:
+            if row[id_] in movie_index:
+                continue
+            movie_index[sys.intern(row[id_])] = len(movie_index)
+            movie_ids.append(row[id_])
+            movie_titles.append(row[title])
+            movie_years.append(row[year])
+
+    edge_people = array("i")
+    edge_movies = array("i")
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        person_column = columns.index("person_id")
+        movie_column = columns.index("movie_id")
+        for row in reader:
+            person = person_index.get(row[person_column])
+            movie = movie_index.get(row[movie_column])
+            # stars of unknown people or movies are skipped, as load_data always did
+            if person is not None and movie is not None:
+                edge_people.append(person)
+                edge_movies.append(movie)
+
+    person_offsets, person_movies = _csr(edge_people, edge_movies, len(person_index))
+    movie_offsets, movie_stars = _csr(edge_movies, edge_people, len(movie_index))
+
+    return Graph(person_ids.table(), movie_ids.table(),
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_names.table(), person_births.table(),
+                 movie_titles.table(), movie_years.table(),
+                 person_index=person_index, movie_index=movie_index)
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in bytes,
+    or None where the resource module is not available (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # reported in bytes on macOS and in kilobytes everywhere else
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _csr(sources, targets, size):
+    """
+    Counting-sorts the (source, target) edge list into CSR offsets and
+    targets, dropping repeated edges.
+    """
+    offsets = array("i", [0]) * (size + 1)
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    edges = array("i", [0]) * len(sources)
+    fill = array("i", offsets)
+    for source, target in zip(sources, targets):
+        edges[fill[source]] = target
+        fill[source] += 1
+
+    # compact each row in place, keeping the first copy of every edge
+    write = 0
+    for i in range(size):
+        start, end = offsets[i], offsets[i + 1]
+        offsets[i] = write
+        if end - start == 1:
+            edges[write] = edges[start]
+            write += 1
+            continue
+        seen = set()
+        for j in range(start, end):
+            target = edges[j]
+            if target not in seen:
+                seen.add(target)
+                edges[write] = target
+                write += 1
+    offsets[size] = write
+    del edges[write:]
+
+    return offsets, edges
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python ingest.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+
+    start = time.perf_counter()
+    graph = load_graph(directory)
+    elapsed = time.perf_counter() - start
+    print(f"{len(graph.person_ids)} people, {len(graph.movie_ids)} movies, "
+          f"{len(graph.person_movies)} stars loaded in {elapsed:.2f}s.")
+    peak = peak_rss()
+    if peak is not None:
+        print(f"Peak RSS: {peak / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Landmark distance index for degrees.
+
+A handful of well connected "landmark" people are chosen and the number
+of degrees from each of them to everybody else is stored. By the
+triangle inequality, for any landmark L
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+so degree bounds between any two people cost k array lookups, and the
+lower bound is an admissible heuristic for A* (the ALT algorithm). A
+search only consults the few landmarks with the best bound for its pair.
+
+Usage: python landmarks.py [directory] [k]
+"""
+
+import heapq
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+
+import snapshot
+
+
+FILENAME = "landmarks.index"
+MAGIC = b"DEGLMK01"
+HEADER = struct.Struct("8s" + "qq" * len(snapshot.SOURCES))
+
+# Landmarks guiding one A* search, those with the best bounds for its pair
+ACTIVE = 4
+
+
+class LandmarkIndex():
+
+    def __init__(self, landmarks, distances):
+        # person indexes of the landmarks
+        self.landmarks = landmarks
+
+        # distances[i][p] is the degrees from landmark i to person p, -1 if unreachable
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, k=16):
+        """
+        Picks the k people with the most co-star links as landmarks
+        and runs one breadth-first search from each of them.
+        """
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+
+        def links(person):
+            total = 0
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                total += movie_offsets[movie + 1] - movie_offsets[movie]
+            return total
+
+        landmarks = array("i", heapq.nlargest(k, range(len(graph)), key=links))
+        distances = [array("h", graph.distances(landmark)) for landmark in landmarks]
+        return cls(landmarks, distances)
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees between two person
+        indexes. upper is math.inf when no landmark reaches both, and both
+        are math.inf when a landmark proves the two are not connected.
+        """
+        lower = 0
+        upper = math.inf
+        for distance in self.distances:
+            to_source = distance[source]
+            to_target = distance[target]
+            if to_source == -1 or to_target == -1:
+                if to_source != to_target:
+                    return math.inf, math.inf
+                continue
+            gap = to_source - to_target if to_source > to_target else to_target - to_source
+            if gap > lower:
+                lower = gap
+            if to_source + to_target < upper:
+                upper = to_source + to_target
+        return lower, upper
+
+    def shortest_path(self, graph, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, both given as IMDB ids,
+        using A* search guided by the lower bounds of the ACTIVE
+        landmarks that bound this pair best.
+
+        If no possible path, returns None.
+        """
+        source = graph.person_index[source]
+        target = graph.person_index[target]
+        lower, upper = self.bounds(source, target)
+        if lower == math.inf:
+            graph.num_explored = 0
+            return None
+
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_stars = graph.movie_stars
+
+        # only the few landmarks with the best lower bound for this pair guide
+        # the search, bounds from the others are rarely better and cost as much
+        useful = [(distance, distance[target]) for distance in self.distances
+                  if distance[target] != -1 and distance[source] != -1]
+        useful.sort(key=lambda landmark: -abs(landmark[0][source] - landmark[1]))
+        active = useful[:ACTIVE]
+
+        size = len(graph)
+        # lower bound of each person, computed once, -1 until then
+        bound = array("h", [-1]) * size
+
+        # the active landmarks reach the target, so they reach everyone
+        # the search can, and no distance below is -1
+        def heuristic(person):
+            best = 0
+            for distance, to_target in active:
+                gap = distance[person] - to_target
+                if gap < 0:
+                    gap = -gap
+                if gap > best:
+                    best = gap
+            bound[person] = best
+            return best
+
+        cost = array("i", [-1]) * size
+        parent = array("i", [-1]) * size
+        via = array("i", [-1]) * size
+        closed = bytearray(size)
+        # cheapest cost a movie's cast was scanned from, later scans must beat it
+        movie_cost = array("i", [size]) * len(graph.movie_ids)
+
+        # The bounds are consistent and every step costs one, so the estimate
+        # f = g + h of popped people never decreases and a list of stacks by
+        # f replaces the heap. Popping the newest entry of a stack breaks ties
+        # towards the deepest people, the ones closest to the target.
+        cost[source] = 0
+        parent[source] = source
+        f = heuristic(source)
+        buckets = [[] for _ in range(f + 1)]
+        buckets[f].append(source)
+        explored = 0
+        while f < len(buckets):
+            bucket = buckets[f]
+            if not bucket:
+                f += 1
+                continue
+            person = bucket.pop()
+            if closed[person]:
+                continue
+            closed[person] = 1
+            explored += 1
+            if person == target:
+                break
+
+            g = cost[person]
+            step = g + 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if movie_cost[movie] <= g:
+                    continue
+                movie_cost[movie] = g
+
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if closed[star] or (cost[star] != -1 and cost[star] <= step):
+                        continue
+                    estimate = bound[star]
+                    if estimate == -1:
+                        estimate = heuristic(star)
+                    estimate += step
+                    if estimate > upper:
+                        # every path through star is longer than one via a landmark
+                        continue
+                    cost[star] = step
+                    parent[star] = person
+                    via[star] = movie
+                    while estimate >= len(buckets):
+                        buckets.append([])
+                    buckets[estimate].append(star)
+
+        graph.num_explored = explored
+        if parent[target] == -1:
+            return None
+        return graph.path(parent, via, source, target)
+
+
+def save(index, directory):
+    """
+    Writes index next to the CSV files of directory.
+    """
+    path = os.path.join(directory, FILENAME)
+    partial = path + ".partial"
+    with open(partial, "wb") as f:
+        f.write(HEADER.pack(MAGIC, *snapshot.signature(directory)))
+        snapshot.write_section(f, index.landmarks)
+        for distance in index.distances:
+            snapshot.write_section(f, distance)
+    os.replace(partial, path)
+
+
+def load(directory):
+    """
+    Returns the memory-mapped LandmarkIndex of directory, or None if
+    there is none, its CSV files have changed or it is damaged.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(data) < HEADER.size:
+        return None
+    magic, *stamp = HEADER.unpack_from(data)
+    if magic != MAGIC or stamp != snapshot.signature(directory):
+        return None
+
+    view = memoryview(data)
+    try:
+        landmarks, position = snapshot.read_section(view, HEADER.size)
+        distances = []
+        for _ in landmarks:
+            distance, position = snapshot.read_section(view, position)
+            distances.append(distance)
+    except (struct.error, ValueError, TypeError):
+        # truncated or corrupt, build the index again
+        return None
+    return LandmarkIndex(landmarks, distances)
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python landmarks.py [directory] [k]")
+    directory = sys.argv[1] if len(sys.argv) >= 2 else "large"
+    k = int(sys.argv[2]) if len(sys.argv) == 3 else 16
+
+    import degrees
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    start = time.perf_counter()
+    index = LandmarkIndex.build(degrees.graph, k)
+    save(index, directory)
+    print(f"Indexed {len(index.landmarks)} landmarks in {time.perf_counter() - start:.2f}s.")
+
+
+if __name__ == "__main__":
+    main()
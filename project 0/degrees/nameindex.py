@@ -0,0 +1,226 @@
+"""
+Prefix and typo-tolerant person name lookup for degrees.
+
+Names are normalized (case, accents, punctuation and spacing folded)
+and indexed twice: a sorted order for prefix search, and a deletion
+index mapping every name and every string left by deleting one of its
+characters to the people with that name. A typo query looks up the few
+strings within its edit budget there and ranks what it finds by edit
+distance, so it never scans the whole table.
+"""
+
+import unicodedata
+from array import array
+from bisect import bisect_left
+from itertools import chain
+
+
+# Queries this long tolerate two typos by default, shorter ones a single typo
+LONG_QUERY = 8
+
+
+def normalize(name):
+    """
+    Returns name lowercased, without accents or punctuation,
+    and with single spaces between words.
+    """
+    name = unicodedata.normalize("NFKD", name.lower())
+    name = "".join(c if c.isalnum() else " " for c in name if not unicodedata.combining(c))
+    return " ".join(name.split())
+
+
+def deletes(word):
+    """
+    Returns the set of strings left by deleting one character of word.
+    """
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between a and b,
+    or limit + 1 as soon as it is known to exceed limit.
+
+    A common prefix and suffix cost nothing, so they are stripped and the
+    first differing characters are tried as a substitution, a deletion and
+    an insertion, each with one edit less to spend. That is at most
+    3 ** limit branches, cheap for the one or two edits of a typo lookup.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    start, end = 0, min(len(a), len(b))
+    while start < end and a[start] == b[start]:
+        start += 1
+    tail = 0
+    while tail < end - start and a[-1 - tail] == b[-1 - tail]:
+        tail += 1
+    a = a[start:len(a) - tail]
+    b = b[start:len(b) - tail]
+
+    if len(a) <= 1 and len(b) <= 1:
+        # what is left is a single substitution, insertion or deletion
+        return min(max(len(a), len(b)), limit + 1)
+    if not a or not b or limit == 0:
+        return min(len(a) + len(b), limit + 1)
+    return 1 + min(
+        edit_distance(a[1:], b[1:], limit - 1),
+        edit_distance(a[1:], b, limit - 1),
+        edit_distance(a, b[1:], limit - 1),
+    )
+
+
+class NameIndex():
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.names = [normalize(name) for name in graph.person_names]
+
+        # person indexes sorted by normalized name
+        names = self.names
+        self.order = array("i", sorted(range(len(names)), key=names.__getitem__))
+
+        # each name and its single deletions -> a person index, or an array
+        # of them once several people share the key
+        keys = {}
+        for person, name in enumerate(names):
+            variants = deletes(name)
+            variants.add(name)
+            for key in variants:
+                people = keys.get(key)
+                if people is None:
+                    keys[key] = person
+                elif type(people) is int:
+                    keys[key] = array("i", (people, person))
+                else:
+                    people.append(person)
+        self.keys = keys
+
+        # characters a typo query may be missing, for two-edit lookups
+        self.alphabet = "".join(sorted(set().union(*names)))
+
+    def lookup(self, query, limit=10, max_distance=None):
+        """
+        Returns up to limit candidates for query, best first, as dicts of
+        person_id, name, birth and distance (the edit distance between the
+        normalized names, 0 for exact and prefix matches). Never prompts.
+
+        max_distance is at most 2, and defaults to 2 for queries of
+        LONG_QUERY characters or more and to 1 for shorter ones.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        if max_distance is None:
+            max_distance = 2 if len(query) >= LONG_QUERY else 1
+
+        found = {}
+        for person in self.prefix(query, limit):
+            found[person] = 0
+        if len(found) < limit:
+            # fuzzy may return prefix matches again, ask for enough to fill limit
+            for distance, person in self.fuzzy(query, limit + len(found), max_distance):
+                found.setdefault(person, distance)
+
+        # exact matches first, then prefix matches, then by distance
+        names = self.names
+        ranked = sorted(found, key=lambda person: (
+            names[person] != query, found[person], len(names[person]), names[person]
+        ))
+        graph = self.graph
+        return [
+            {
+                "person_id": graph.person_ids[person],
+                "name": graph.person_names[person],
+                "birth": graph.person_births[person],
+                "distance": found[person],
+            }
+            for person in ranked[:limit]
+        ]
+
+    def prefix(self, query, limit):
+        """
+        Returns up to limit person indexes whose normalized name starts with query.
+        """
+        names = self.names
+        order = self.order
+        found = []
+        i = bisect_left(order, query, key=names.__getitem__)
+        while i < len(order) and len(found) < limit and names[order[i]].startswith(query):
+            found.append(order[i])
+            i += 1
+        return found
+
+    def fuzzy(self, query, limit, max_distance):
+        """
+        Returns up to limit (distance, person index) pairs within
+        max_distance edits of query, closest first.
+
+        Distances are searched one edit at a time. Everyone closer has been
+        found by the time a distance is searched, so the search stops as soon
+        as limit people are found, keeping whichever equally close ones
+        came first. People further than the current distance wait for the
+        next one.
+        """
+        if max_distance > 2:
+            raise ValueError("names can only be looked up within two edits")
+        names = self.names
+        seen = set()
+        found = []
+        further = []
+        for distance in range(1, max_distance + 1):
+            waiting, further = further, []
+            for person in chain(waiting, self.candidates(query, distance, seen)):
+                d = edit_distance(query, names[person], distance)
+                if d > distance:
+                    further.append(person)
+                    continue
+                found.append((d, person))
+                if len(found) >= limit:
+                    return sorted(found)
+        return sorted(found)
+
+    def candidates(self, query, distance, seen):
+        """
+        Yields the people not in seen whose name or one of its deletions
+        is a key of the neighborhood of query, adding them to seen.
+        """
+        keys = self.keys
+        for key in self.neighborhood(query, distance):
+            people = keys.get(key)
+            if people is None:
+                continue
+            for person in (people,) if type(people) is int else people:
+                if person not in seen:
+                    seen.add(person)
+                    yield person
+
+    def neighborhood(self, query, distance):
+        """
+        Yields the keys to look up so that every name exactly distance
+        edits from query is found, distance being 1 or 2. Keys may repeat.
+
+        Within one edit the name or one of its deletions equals the query
+        or one of its deletions. Within two edits the name or one of its
+        deletions equals the query with two characters deleted, with one
+        character substituted or inserted, or with one character deleted
+        and another substituted.
+        """
+        if distance == 1:
+            yield query
+            yield from deletes(query)
+            return
+
+        alphabet = self.alphabet
+        shorter = deletes(query)
+        for word in shorter:
+            yield from deletes(word)
+        for i in range(len(query)):
+            for c in alphabet:
+                yield query[:i] + c + query[i + 1:]
+        for i in range(len(query) + 1):
+            for c in alphabet:
+                yield query[:i] + c + query[i:]
+        for word in shorter:
+            for i in range(len(word)):
+                for c in alphabet:
+                    yield word[:i] + c + word[i + 1:]
@@ -0,0 +1,157 @@
+"""
+Binary snapshot of a parsed degrees dataset.
+
+The snapshot is written next to the CSV files and holds the CSR arrays
+and string tables of a Graph. Loading it memory-maps the file and wraps
+each section in a memoryview, so nothing is parsed or copied up front;
+pages are read in by the OS as searches touch them.
+
+The CSV mtimes and sizes are stored in the header, and a snapshot whose
+CSV files have changed since is ignored. Arrays are stored in native
+byte order, the snapshot is a local cache and not meant to be shared.
+"""
+
+import mmap
+import os
+import struct
+from array import array
+
+from graph import Graph
+
+
+FILENAME = "degrees.snapshot"
+MAGIC = b"DEGSNAP1"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# magic followed by (mtime_ns, size) of each source file
+HEADER = struct.Struct("8s" + "qq" * len(SOURCES))
+
+# typecode and item count of a section
+SECTION = struct.Struct("cq")
+
+# order of the Graph fields inside the snapshot
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars", "name_order")
+STRINGS = ("person_ids", "person_names", "person_births",
+           "movie_ids", "movie_titles", "movie_years")
+
+
+class StringTable():
+    """
+    Read-only sequence of strings stored as an offsets array and a utf-8 blob.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def signature(directory):
+    """
+    Returns the (mtime_ns, size) pairs of the CSV files, flattened.
+    """
+    values = []
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        values.extend((stat.st_mtime_ns, stat.st_size))
+    return values
+
+
+def save(graph, directory):
+    """
+    Writes a snapshot of graph into directory.
+    """
+    path = os.path.join(directory, FILENAME)
+    partial = path + ".partial"
+    with open(partial, "wb") as f:
+        f.write(HEADER.pack(MAGIC, *signature(directory)))
+        for field in ARRAYS:
+            write_section(f, array("i", getattr(graph, field)))
+        for field in STRINGS:
+            offsets = array("i", [0])
+            blob = bytearray()
+            for value in getattr(graph, field):
+                blob += value.encode("utf-8")
+                offsets.append(len(blob))
+            write_section(f, offsets)
+            write_section(f, blob)
+
+    # never leave a half written snapshot behind under the real name
+    os.replace(partial, path)
+
+
+def load(directory):
+    """
+    Returns the Graph stored in the snapshot of directory,
+    or None if there is no snapshot, it is out of date or it is damaged.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(data) < HEADER.size:
+        return None
+    magic, *stamp = HEADER.unpack_from(data)
+    if magic != MAGIC or stamp != signature(directory):
+        return None
+
+    view = memoryview(data)
+    position = HEADER.size
+    fields = {}
+    try:
+        for field in ARRAYS:
+            fields[field], position = read_section(view, position)
+        for field in STRINGS:
+            offsets, position = read_section(view, position)
+            blob, position = read_section(view, position)
+            fields[field] = StringTable(offsets, blob)
+    except (struct.error, ValueError, TypeError):
+        # truncated or corrupt, parse the CSV files again
+        return None
+
+    return Graph(**fields)
+
+
+def write_section(f, values):
+    """
+    Writes an array or bytes-like section, padded to 8 bytes.
+    """
+    typecode = values.typecode if isinstance(values, array) else "B"
+    data = memoryview(values).cast("B")
+    f.write(SECTION.pack(typecode.encode(), len(values)))
+    f.write(data)
+    f.write(bytes(-len(data) % 8))
+
+
+def read_section(view, position):
+    """
+    Returns the section at position of view, cast to its typecode,
+    and the position just after it.
+
+    Raises ValueError if the section does not fit in view.
+    """
+    typecode, count = SECTION.unpack_from(view, position)
+    position += SECTION.size
+    typecode = typecode.decode()
+    size = count * struct.calcsize(typecode)
+    if count < 0 or position + size > len(view):
+        raise ValueError("section runs past the end of the file")
+    section = view[position:position + size].cast(typecode)
+    position += size + (-size % 8)
+    return section, position
@@ -0,0 +1,125 @@
+"""
+Solves many maze files at once with a pool of worker processes.
+
+Takes maze files, directories of .txt mazes, or glob patterns, and
+writes one JSON object per maze to stdout, in input order. Images are
+named by their maze's position in the input and its file name.
+
+Usage: python batch.py [--strategy S] [--workers N] [--print] [--images DIR] paths...
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from maze import STRATEGIES, Maze
+
+
+def maze_files(paths):
+    """
+    Expands directories and glob patterns into a sorted list of maze files.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.txt"))))
+        elif glob.has_magic(path):
+            files.extend(sorted(glob.glob(path, recursive=True)))
+        else:
+            files.append(path)
+    return files
+
+
+def solve(filename, strategy, show=False, images=None, image_name=None):
+    """
+    Parses and solves one maze, returns its result record. With images,
+    its PNG is written there as image_name, by default the file's name.
+    """
+    record = {"maze": filename, "strategy": strategy}
+    try:
+        start = time.perf_counter()
+        m = Maze(filename)
+        record["parse_seconds"] = time.perf_counter() - start
+
+        record["height"] = m.height
+        record["width"] = m.width
+        try:
+            m.solve(strategy)
+        except Exception as e:
+            if str(e) != "no solution":
+                raise
+            record["solved"] = False
+        else:
+            record["solved"] = True
+            record["length"] = len(m.solution[0])
+        record["explored"] = m.num_explored
+        record["solve_seconds"] = m.elapsed
+
+        if show:
+            m.print()
+        if images is not None:
+            if image_name is None:
+                image_name = os.path.splitext(os.path.basename(filename))[0] + ".png"
+            record["image"] = os.path.join(images, image_name)
+            m.output_image(record["image"], show_explored=True)
+    except Exception as e:
+        record["error"] = str(e)
+    return record
+
+
+def _solve(job):
+    return solve(*job)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve maze files in bulk.")
+    parser.add_argument("paths", nargs="+", help="maze files, directories or glob patterns")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="bfs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), metavar="N")
+    parser.add_argument("--print", dest="show", action="store_true",
+                        help="also print each solved maze")
+    parser.add_argument("--images", metavar="DIRECTORY",
+                        help="write a PNG of each solved maze here")
+    args = parser.parse_args()
+
+    files = maze_files(args.paths)
+    if args.images is not None:
+        os.makedirs(args.images, exist_ok=True)
+    # mazes in different directories may share a file name, so images
+    # are prefixed with the maze's position in the input
+    digits = len(str(len(files)))
+    jobs = [
+        (filename, args.strategy, args.show, args.images,
+         f"{i:0{digits}d}-{os.path.splitext(os.path.basename(filename))[0]}.png")
+        for i, filename in enumerate(files)
+    ]
+
+    start = time.perf_counter()
+    if args.workers <= 1 or args.show:
+        # printed mazes would interleave between processes
+        results = map(_solve, jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(args.workers)
+        # imap keeps input order while letting workers run ahead
+        results = pool.imap(_solve, jobs, chunksize=max(1, len(jobs) // (args.workers * 8)))
+
+    try:
+        for record in results:
+            print(json.dumps(record), flush=args.show)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    elapsed = time.perf_counter() - start
+    rate = len(jobs) / elapsed if elapsed else float("inf")
+    print(f"{len(jobs)} mazes in {elapsed:.3f}s ({rate:.1f} mazes/s).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
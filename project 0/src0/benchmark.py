@@ -0,0 +1,99 @@
+"""
+Scaling benchmark for maze solving.
+
+Generates mazes of growing size with each generator algorithm and
+solves every one with each search strategy, recording parse time,
+solve time, states explored, path length and peak traced memory.
+Results are printed as one JSON object per (maze, strategy) run.
+
+Usage: python benchmark.py [--sizes N [N ...]] [--algorithms ...] [--strategies ...]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from generate import ALGORITHMS, generate
+from maze import STRATEGIES, Maze
+
+
+def run(filename, strategy, memory=True):
+    """
+    Solves one maze file with one strategy and returns its measurements.
+    Memory is measured in a second, traced solve so tracing does not
+    slow down the timed one.
+    """
+    m = Maze(filename)
+    result = {"strategy": strategy}
+    try:
+        m.solve(strategy)
+        result["length"] = len(m.solution[0])
+    except Exception as e:
+        if str(e) != "no solution":
+            raise
+        result["length"] = None
+    result["explored"] = m.num_explored
+    result["solve_seconds"] = m.elapsed
+
+    if memory:
+        m = Maze(filename)
+        tracemalloc.start()
+        try:
+            m.solve(strategy)
+        except Exception:
+            pass
+        result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark maze strategies over maze sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[51, 101, 201, 401],
+                        help="side length of each generated square maze")
+    parser.add_argument("--algorithms", nargs="+", choices=ALGORITHMS, default=list(ALGORITHMS))
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--density", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="skip the traced run that measures peak memory")
+    parser.add_argument("--output", help="write JSON lines here instead of stdout")
+    args = parser.parse_args()
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    with tempfile.TemporaryDirectory(prefix="maze-benchmark-") as directory:
+        for algorithm in args.algorithms:
+            for size in args.sizes:
+                filename = os.path.join(directory, f"{algorithm}-{size}.txt")
+                start = time.perf_counter()
+                lines = generate(algorithm, size, size, args.seed, args.density)
+                with open(filename, "w") as f:
+                    f.write("\n".join(lines))
+                generated = time.perf_counter() - start
+
+                start = time.perf_counter()
+                Maze(filename)
+                parsed = time.perf_counter() - start
+
+                for strategy in args.strategies:
+                    record = {
+                        "algorithm": algorithm,
+                        "size": size,
+                        "cells": size * size,
+                        "seed": args.seed,
+                        "generate_seconds": generated,
+                        "parse_seconds": parsed,
+                        **run(filename, strategy, args.memory),
+                    }
+                    print(json.dumps(record), file=output, flush=True)
+
+    if output is not sys.stdout:
+        output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Procedural maze generator.
+
+    backtracker  perfect maze from a randomized depth-first search,
+                 long winding corridors and few branches
+    prim         perfect maze from randomized Prim's algorithm,
+                 many short dead ends
+    random       every cell is a wall with probability density,
+                 open rooms that may have no solution
+
+Perfect mazes carve corridors between the odd (row, col) cells, so the
+start is always (1, 1) and the goal the bottom right corridor cell.
+
+Usage: python generate.py algorithm height width [--seed S] [--density D] [-o maze.txt]
+"""
+
+import argparse
+import random
+import sys
+
+
+WALL = ord("#")
+OPEN = ord(" ")
+
+ALGORITHMS = ("backtracker", "prim", "random")
+
+
+def generate(algorithm, height, width, seed=None, density=0.3):
+    """
+    Returns the lines of a generated maze file.
+    """
+    rng = random.Random(seed)
+    if algorithm == "random":
+        cells, start, goal = _random_walls(rng, height, width, density)
+    elif algorithm in ("backtracker", "prim"):
+        start = width + 1
+        goal = ((height - 3) // 2 * 2 + 1) * width + (width - 3) // 2 * 2 + 1
+        if height < 3 or width < 3 or goal == start:
+            raise ValueError("perfect mazes need at least 3 x 5 cells")
+        cells = bytearray([WALL]) * (height * width)
+        carve = _backtracker if algorithm == "backtracker" else _prim
+        carve(rng, cells, height, width)
+    else:
+        raise ValueError(f"unknown algorithm {algorithm!r}, choose from {', '.join(ALGORITHMS)}")
+
+    cells[start] = ord("A")
+    cells[goal] = ord("B")
+    return [cells[i:i + width].decode("ascii") for i in range(0, len(cells), width)]
+
+
+def _random_walls(rng, height, width, density):
+    if height * width < 2:
+        raise ValueError("a maze needs room for a start and a goal")
+    cells = bytearray(WALL if rng.random() < density else OPEN for _ in range(height * width))
+    return cells, 0, height * width - 1
+
+
+def _lattice_neighbors(cell, height, width):
+    """
+    Yields the corridor cells two steps away from cell, and the wall between.
+    """
+    row, col = divmod(cell, width)
+    if row > 2:
+        yield cell - 2 * width, cell - width
+    if row < height - 3:
+        yield cell + 2 * width, cell + width
+    if col > 2:
+        yield cell - 2, cell - 1
+    if col < width - 3:
+        yield cell + 2, cell + 1
+
+
+def _backtracker(rng, cells, height, width):
+    start = width + 1
+    cells[start] = OPEN
+    stack = [start]
+    while stack:
+        cell = stack[-1]
+        options = [(nxt, between) for nxt, between in _lattice_neighbors(cell, height, width)
+                   if cells[nxt] == WALL]
+        if not options:
+            stack.pop()
+            continue
+        nxt, between = rng.choice(options)
+        cells[between] = OPEN
+        cells[nxt] = OPEN
+        stack.append(nxt)
+
+
+def _prim(rng, cells, height, width):
+    start = width + 1
+    cells[start] = OPEN
+    frontier = [nxt for nxt, _ in _lattice_neighbors(start, height, width)]
+    queued = set(frontier)
+    while frontier:
+        # pop a random frontier cell in O(1) by swapping it to the end
+        i = rng.randrange(len(frontier))
+        frontier[i], frontier[-1] = frontier[-1], frontier[i]
+        cell = frontier.pop()
+
+        carved = [between for nxt, between in _lattice_neighbors(cell, height, width)
+                  if cells[nxt] == OPEN]
+        cells[rng.choice(carved)] = OPEN
+        cells[cell] = OPEN
+
+        for nxt, _ in _lattice_neighbors(cell, height, width):
+            if cells[nxt] == WALL and nxt not in queued:
+                queued.add(nxt)
+                frontier.append(nxt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a maze file.")
+    parser.add_argument("algorithm", choices=ALGORITHMS)
+    parser.add_argument("height", type=int)
+    parser.add_argument("width", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--density", type=float, default=0.3,
+                        help="wall probability of the random algorithm")
+    parser.add_argument("-o", "--output", help="maze file to write, stdout by default")
+    args = parser.parse_args()
+
+    try:
+        lines = generate(args.algorithm, args.height, args.width, args.seed, args.density)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    with output:
+        for line in lines:
+            print(line, file=output)
+
+
+if __name__ == "__main__":
+    main()
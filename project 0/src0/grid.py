@@ -0,0 +1,254 @@
+"""
+Compact grid storage for mazes.
+
+Every cell is one byte of a bytearray holding the cost of entering it,
+0 for walls. The grid is padded with a border of walls, so a cell is an
+integer index row * stride + col into the padded array and its
+neighbors are index + offset for four fixed offsets, no bounds checks.
+"""
+
+import mmap
+import os
+from array import array
+
+WALL = 0
+
+# Maze file characters that are open cells, and what entering them costs
+OPEN = {" ": 1, "A": 1, "B": 1, **{str(cost): cost for cost in range(1, 10)}}
+
+# bytes.translate table from maze file characters to cell bytes
+TABLE = bytes(OPEN.get(chr(c), WALL) for c in range(256))
+
+# bytes.translate table from cell bytes to 1 for open cells, 0 for walls
+UNVISITED = bytes([0]) + bytes([1]) * 255
+
+# Frontiers of at most this many cells are expanded without NumPy
+NARROW = 32
+
+
+def encode_row(line):
+    """
+    Returns the cell bytes of one maze file line, given as str or ASCII bytes.
+    """
+    if isinstance(line, bytes):
+        return line.translate(TABLE)
+    if line.isascii():
+        return line.encode("ascii").translate(TABLE)
+    return bytes(OPEN.get(c, WALL) for c in line)
+
+
+def line_spans(data):
+    """
+    Yields the (begin, end) offsets of each line of data, without line
+    endings. Like str.splitlines, a final newline does not start a line.
+    """
+    size = len(data)
+    begin = 0
+    while begin < size:
+        end = data.find(b"\n", begin)
+        if end == -1:
+            end = size
+        stop = end
+        if stop > begin and data[stop - 1] == ord("\r"):
+            stop -= 1
+        yield begin, stop
+        begin = end + 1
+
+
+class Grid():
+
+    def __init__(self, height, width, cells, start, goal):
+        """
+        cells is the padded bytearray of (height + 2) * (width + 2) cells,
+        start and goal are cell indexes into it.
+        """
+        self.height = height
+        self.width = width
+        self.stride = width + 2
+        self.cells = cells
+        self.start = start
+        self.goal = goal
+
+        # (action, index offset) of each move, in the order neighbors are tried
+        self.moves = (
+            ("up", -self.stride),
+            ("down", self.stride),
+            ("left", -1),
+            ("right", 1),
+        )
+
+    @classmethod
+    def from_file(cls, filename):
+        """
+        Parses a maze file where "A" is the start, "B" the goal, spaces
+        and digits are open cells and anything else is a wall.
+
+        The file is memory-mapped and read in two passes over its lines,
+        one to validate start and goal and measure the grid, one to
+        translate each line straight into the cell buffer, so besides the
+        grid itself only one line is ever held in memory.
+        """
+        with open(filename, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise Exception("maze must have exactly one start point")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+
+                # Validate start and goal, and determine height and width of maze
+                height = width = 0
+                starts = goals = 0
+                for begin, end in line_spans(data):
+                    line = data[begin:end]
+                    if not line.isascii():
+                        line = line.decode()
+                    marks = (b"A", b"B") if isinstance(line, bytes) else ("A", "B")
+                    if marks[0] in line:
+                        starts += line.count(marks[0])
+                        start = (height, line.index(marks[0]))
+                    if marks[1] in line:
+                        goals += line.count(marks[1])
+                        goal = (height, line.index(marks[1]))
+                    width = max(width, len(line))
+                    height += 1
+                if starts != 1:
+                    raise Exception("maze must have exactly one start point")
+                if goals != 1:
+                    raise Exception("maze must have exactly one goal")
+
+                stride = width + 2
+                cells = bytearray(stride * (height + 2))
+                for i, (begin, end) in enumerate(line_spans(data)):
+                    line = data[begin:end]
+                    if not line.isascii():
+                        line = line.decode()
+                    row = (i + 1) * stride + 1
+                    cells[row:row + width] = encode_row(line.ljust(width))
+
+        start = (start[0] + 1) * stride + start[1] + 1
+        goal = (goal[0] + 1) * stride + goal[1] + 1
+        return cls(height, width, cells, start, goal)
+
+    def index(self, row, col):
+        """Returns the cell index of (row, col)."""
+        return (row + 1) * self.stride + col + 1
+
+    def position(self, index):
+        """Returns the (row, col) of a cell index."""
+        row, col = divmod(index, self.stride)
+        return (row - 1, col - 1)
+
+    def is_wall(self, row, col):
+        """Returns whether (row, col) is a wall, cells outside the grid are."""
+        if 0 <= row < self.height and 0 <= col < self.width:
+            return self.cells[self.index(row, col)] == WALL
+        return True
+
+    def cost(self, row, col):
+        """Returns the cost of entering (row, col)."""
+        return self.cells[self.index(row, col)]
+
+    def walls(self):
+        """Returns the grid as rows of wall flags, like Maze.walls always was."""
+        return Walls(self)
+
+    def distance_field(self, source, target=None):
+        """
+        Returns a height x width NumPy array of the number of moves from
+        the source cell index to every cell, -1 for walls and cells it
+        cannot reach. Cell costs are ignored, every move counts as one.
+
+        The search advances the whole frontier at once: the frontier is
+        an array of cell indexes into the padded grid, and the next one is
+        every index plus each of the four offsets that is still unvisited,
+        so a step costs time in proportion to the frontier alone. Narrow
+        frontiers, like a corridor's one or two cells, are expanded in a
+        plain loop over the same buffers instead, where NumPy's per-call
+        overhead would dominate. With a target cell index it stops once
+        the target has its distance.
+        """
+        import numpy as np
+
+        # bytearray and array buffers, so the loop and NumPy share them
+        unvisited_cells = bytearray(self.cells).translate(UNVISITED)
+        unvisited = np.frombuffer(unvisited_cells, dtype=np.bool_)
+        distances = array("i", [-1]) * len(self.cells)
+        distance = np.frombuffer(distances, dtype=np.int32)
+        offsets = tuple(offset for _, offset in self.moves)
+        offset_array = np.array(offsets, dtype=np.intp)
+
+        frontier = [source]
+        unvisited_cells[source] = 0
+        distances[source] = 0
+        step = 0
+        while len(frontier) and (target is None or distances[target] == -1):
+            step += 1
+
+            # the wall border keeps every neighbor index inside the grid
+            if len(frontier) <= NARROW:
+                reached = []
+                for cell in frontier:
+                    for offset in offsets:
+                        neighbor = cell + offset
+                        if unvisited_cells[neighbor]:
+                            unvisited_cells[neighbor] = 0
+                            distances[neighbor] = step
+                            reached.append(neighbor)
+            else:
+                reached = (np.asarray(frontier, dtype=np.intp)[:, None] + offset_array).ravel()
+                reached = reached[unvisited[reached]]
+                # a cell next to several frontier cells is reached once
+                reached = np.unique(reached)
+                unvisited[reached] = False
+                distance[reached] = step
+                if len(reached) <= NARROW:
+                    reached = reached.tolist()
+            frontier = reached
+
+        return distance.reshape(self.height + 2, self.stride)[1:-1, 1:-1]
+
+
+class Walls():
+    """
+    Read-only rows of booleans, True for walls, built a row at a time.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+
+    def __len__(self):
+        return self.grid.height
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.grid.height:
+            raise IndexError("row out of range")
+        start = self.grid.index(row, 0)
+        return [cell == WALL for cell in self.grid.cells[start:start + self.grid.width]]
+
+    def __iter__(self):
+        for row in range(self.grid.height):
+            yield self[row]
+
+
+class CellSet():
+    """
+    Read-only set of (row, col) cells, backed by one flag byte per cell index.
+    """
+
+    def __init__(self, grid, flags, mask=1):
+        self.grid = grid
+        self.flags = flags
+        self.mask = mask
+
+    def __contains__(self, cell):
+        row, col = cell
+        if not (0 <= row < self.grid.height and 0 <= col < self.grid.width):
+            return False
+        return bool(self.flags[self.grid.index(row, col)] & self.mask)
+
+    def __iter__(self):
+        mask = self.mask
+        for index, flag in enumerate(self.flags):
+            if flag & mask:
+                yield self.grid.position(index)
+
+    def __len__(self):
+        return sum(1 for _ in self)
@@ -1,21 +1,23 @@
+import heapq
 import sys
+import time
+from array import array
+from collections import deque
+from itertools import count
 
-class Node():
-    def __init__(self, state, parent, action):
-        self.state = state
-        self.parent = parent
-        self.action = action
-
+from grid import WALL, CellSet, Grid
 
 class StackFrontier():
-    def __init__(self):
-        self.frontier = []
+    """
+    Frontier of cell indexes. Membership is tracked by the search in its
+    flag bytes, so the frontier holds nothing but the indexes themselves.
+    """
 
-    def add(self, node):
-        self.frontier.append(node)
+    def __init__(self):
+        self.frontier = deque()
 
-    def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+    def add(self, state):
+        self.frontier.append(state)
 
     def empty(self):
         return len(self.frontier) == 0
@@ -24,9 +26,7 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
+            return self.frontier.pop()
 
 
 class QueueFrontier(StackFrontier):
@@ -35,48 +35,69 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+            return self.frontier.popleft()
 
-class Maze():
 
-    def __init__(self, filename):
+class PriorityFrontier(StackFrontier):
+
+    def __init__(self, priority):
+        super().__init__()
+        # function of a state, lowest is removed first
+        self.priority = priority
+        # breaks priority ties in insertion order
+        self.order = count()
+        self.frontier = []
+
+    def add(self, state):
+        heapq.heappush(self.frontier, (self.priority(state), next(self.order), state))
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            return heapq.heappop(self.frontier)[2]
+
+
+# Strategies whose frontier may hold a cheaper copy of a state already in it
+WEIGHTED = {"dijkstra", "astar"}
+
+STRATEGIES = ("dfs", "bfs", "greedy", "astar", "dijkstra", "field", "jps")
+
+# (row, col) change of each action
+MOVES = (("up", (-1, 0)), ("down", (1, 0)), ("left", (0, -1)), ("right", (0, 1)))
 
-        # Read file and set height and width of maze
-        with open(filename) as f:
-            contents = f.read()
+# Color indexes of output_image, and their colors
+BORDER, EMPTY, EXPLORED_CELL, WALL_CELL, SOLUTION_CELL, GOAL_CELL, START_CELL = range(7)
+PALETTE = (
+    (0, 0, 0),
+    (237, 240, 252),
+    (212, 97, 85),
+    (40, 40, 40),
+    (220, 235, 113),
+    (0, 171, 28),
+    (255, 0, 0),
+)
 
-        # Validate start and goal
-        if contents.count("A") != 1:
-            raise Exception("maze must have exactly one start point")
-        if contents.count("B") != 1:
-            raise Exception("maze must have exactly one goal")
+# Flag bits of a cell during a search
+REACHED = 1
+EXPLORED = 2
 
-        # Determine height and width of maze
-        contents = contents.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
+# Cost of a cell no weighted search has reached yet
+UNREACHED = 2 ** 32 - 1
+
+class Maze():
+
+    def __init__(self, filename):
+
+        # Read file into a compact grid, one byte per cell
+        self.grid = Grid.from_file(filename)
+        self.height = self.grid.height
+        self.width = self.grid.width
+        self.start = self.grid.position(self.grid.start)
+        self.goal = self.grid.position(self.grid.goal)
 
         # Keep track of walls
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
+        self.walls = self.grid.walls()
 
         self.solution = None
 
@@ -94,6 +115,8 @@ class Maze():
                     print("B", end="")
                 elif solution is not None and (i, j) in solution:
                     print("*", end="")
+                elif self.grid.cost(i, j) > 1:
+                    print(self.grid.cost(i, j), end="")
                 else:
                     print(" ", end="")
             print()
@@ -101,129 +124,405 @@ class Maze():
 
 
     def neighbors(self, state):
-        row, col = state
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("left", (row, col - 1)),
-            ("right", (row, col + 1))
-        ]
-
+        grid = self.grid
+        index = grid.index(*state)
         result = []
-        for action, (r, c) in candidates:
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
-                result.append((action, (r, c)))
+        for action, offset in grid.moves:
+            if grid.cells[index + offset] != WALL:
+                result.append((action, grid.position(index + offset)))
         return result
 
 
-    def solve(self):
+    def cost(self, state):
+        """Returns the cost of moving into a cell."""
+        return self.grid.cost(*state)
+
+
+    def heuristic(self, index):
+        """Manhattan distance from a cell index to the goal."""
+        row, col = divmod(index, self.grid.stride)
+        goal_row, goal_col = divmod(self.grid.goal, self.grid.stride)
+        return abs(row - goal_row) + abs(col - goal_col)
+
+
+    def frontier(self, strategy, costs=None):
+        """
+        Returns an empty frontier that expands states in strategy order,
+        costs holds the cost so far of each state for weighted strategies.
+        """
+        if strategy == "dfs":
+            return StackFrontier()
+        elif strategy == "bfs":
+            return QueueFrontier()
+        elif strategy == "greedy":
+            return PriorityFrontier(self.heuristic)
+        elif strategy == "astar":
+            # among equal estimates prefer the state closest to the goal
+            def priority(state):
+                estimate = self.heuristic(state)
+                return (costs[state] + estimate, estimate)
+            return PriorityFrontier(priority)
+        elif strategy == "dijkstra":
+            return PriorityFrontier(costs.__getitem__)
+        raise ValueError(f"unknown strategy {strategy!r}, choose from {', '.join(STRATEGIES)}")
+
+
+    def solve(self, strategy="dfs"):
         """Finds a solution to maze, if one exists."""
 
+        if strategy == "field":
+            return self.solve_field()
+        if strategy == "jps":
+            return self.solve_jps()
+
+        start_time = time.perf_counter()
+        grid = self.grid
+        cells = grid.cells
+        weighted = strategy in WEIGHTED
+
         # Keep track of number of states explored
         self.num_explored = 0
 
-        # Initialize frontier to just the starting position
-        start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
-        frontier.add(start)
-
-        # Initialize an empty explored set
-        self.explored = set()
+        # One flag byte per cell instead of sets of (row, col) tuples, one
+        # byte for the move that reached each cell instead of parent nodes,
+        # and the cheapest known cost of each cell for weighted strategies
+        flags = bytearray(len(cells))
+        flags[grid.start] = REACHED
+        self.explored = CellSet(grid, flags, EXPLORED)
+        via = bytearray(len(cells))
+        costs = None
+        if weighted:
+            costs = array("I", [UNREACHED]) * len(cells)
+            costs[grid.start] = 0
+
+        # Initialize frontier to just the starting position, states are cell indexes
+        frontier = self.frontier(strategy, costs)
+        frontier.add(grid.start)
 
         # Keep looping until solution found
         while True:
 
             # If nothing left in frontier, then no path
             if frontier.empty():
+                self.elapsed = time.perf_counter() - start_time
                 raise Exception("no solution")
 
-            # Choose a node from the frontier
-            node = frontier.remove()
+            # Choose a state from the frontier, skipping stale copies of explored states
+            state = frontier.remove()
+            if flags[state] & EXPLORED:
+                continue
             self.num_explored += 1
 
-            # If node is the goal, then we have a solution
-            if node.state == self.goal:
-                actions = []
-                cells = []
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-                self.solution = (actions, cells)
+            # If state is the goal, then we have a solution
+            if state == grid.goal:
+                self.solution = self.backtrack(via)
+                self.elapsed = time.perf_counter() - start_time
                 return
 
-            # Mark node as explored
-            self.explored.add(node.state)
+            # Mark state as explored
+            flags[state] |= EXPLORED
 
             # Add neighbors to frontier
-            for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action)
-                    frontier.add(child)
-
-
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
-
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
-
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
-
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
-
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
+            for move, (action, offset) in enumerate(grid.moves, 1):
+                neighbor = state + offset
+                cost = cells[neighbor]
+                if cost == WALL or flags[neighbor] & EXPLORED:
+                    continue
+                if weighted:
+                    cost += costs[state]
+                    if cost >= costs[neighbor]:
+                        continue
+                    costs[neighbor] = cost
+                elif flags[neighbor] & REACHED:
+                    continue
+                flags[neighbor] |= REACHED
+                via[neighbor] = move
+                frontier.add(neighbor)
+
+
+    def backtrack(self, via):
+        """
+        Returns the (actions, cells) from the start to the goal, given the
+        number in grid.moves, counting from 1, of the move into each cell.
+        """
+        grid = self.grid
+        actions = []
+        cells = []
+        state = grid.goal
+        while state != grid.start:
+            action, offset = grid.moves[via[state] - 1]
+            actions.append(action)
+            cells.append(grid.position(state))
+            state -= offset
+        actions.reverse()
+        cells.reverse()
+        return (actions, cells)
+
+
+    def distances(self, to_goal=False):
+        """
+        Returns a NumPy array of the number of moves from the start to
+        every cell, or from every cell to the goal, -1 where unreachable.
+        """
+        grid = self.grid
+        return grid.distance_field(grid.goal if to_goal else grid.start)
+
+
+    def solve_field(self):
+        """
+        Finds a shortest solution from a vectorized breadth-first distance
+        field instead of expanding one node at a time. Cell costs are ignored.
+        """
+        start_time = time.perf_counter()
+        grid = self.grid
+        distance = grid.distance_field(grid.start, grid.goal)
+
+        # Explored: every cell closer to the start than the goal, and the goal.
+        # A breadth-first search may also pop some cells as far away as the
+        # goal before it, so bfs can report a few more.
+        import numpy as np
+        goal_distance = int(distance[self.goal])
+        flags = bytearray(len(grid.cells))
+        explored = distance >= 0
+        if goal_distance != -1:
+            explored &= distance < goal_distance
+        padded = np.frombuffer(flags, dtype=np.uint8).reshape(grid.height + 2, grid.stride)
+        padded[1:-1, 1:-1][explored] = EXPLORED
+        self.explored = CellSet(grid, flags, EXPLORED)
+        self.num_explored = int(explored.sum())
+
+        if goal_distance == -1:
+            self.elapsed = time.perf_counter() - start_time
+            raise Exception("no solution")
+        self.num_explored += 1
+
+        # Walk downhill from the goal, one step closer to the start each move
+        actions = []
+        cells = []
+        row, col = self.goal
+        for step in range(goal_distance - 1, -1, -1):
+            cells.append((row, col))
+            for action, (dr, dc) in MOVES:
+                r, c = row - dr, col - dc
+                if 0 <= r < self.height and 0 <= c < self.width and distance[r, c] == step:
+                    actions.append(action)
+                    row, col = r, c
+                    break
+        actions.reverse()
+        cells.reverse()
+        self.solution = (actions, cells)
+        self.elapsed = time.perf_counter() - start_time
+
+
+    def solve_jps(self):
+        """
+        Finds a shortest solution with Jump Point Search adapted to
+        4-connected moves. Straight runs with nothing to decide along them
+        are skipped in a single jump, so only cells where the path may
+        have to turn ever reach the frontier. Needs a uniform-cost maze.
+
+        A vertical jump still steps one cell at a time, looking for a
+        horizontal jump point at every row. That pays off in mazes with
+        corridors and branches. In open rooms, astar walks straight to the
+        goal and is usually faster.
+        """
+        start_time = time.perf_counter()
+        grid = self.grid
+        cells = grid.cells
+        if max(cells) > 1:
+            raise Exception("jump point search needs a maze without weighted cells")
+        stride = grid.stride
+        goal = grid.goal
+        goal_row, goal_col = divmod(goal, stride)
+
+        def heuristic(index):
+            row, col = divmod(index, stride)
+            return abs(row - goal_row) + abs(col - goal_col)
+
+        def jump_horizontal(index, direction):
+            # The first of the goal or a cell with a side opening the previous
+            # cell did not have, before the next wall. Open cells are all 1 here,
+            # so each is a byte search over the run instead of a loop per cell,
+            # only ever searching up to the closest stop found so far.
+            if not cells[index + direction]:
+                return -1
+            point = -1
+            if direction == 1:
+                limit = cells.find(b"\x00", index)
+                if index < goal < limit:
+                    point = limit = goal
+                for side in (-stride, stride):
+                    opening = cells.find(b"\x00\x01", index + side, limit + side)
+                    if opening != -1:
+                        point = limit = opening + 1 - side
+            else:
+                limit = cells.rfind(b"\x00", 0, index)
+                if limit < goal < index:
+                    point = limit = goal
+                for side in (-stride, stride):
+                    opening = cells.rfind(b"\x01\x00", limit + 1 + side, index + 1 + side)
+                    if opening != -1:
+                        point = limit = opening - side
+            return point
+
+        def jump(index, direction):
+            if direction in (1, -1):
+                return jump_horizontal(index, direction)
+            while True:
+                index += direction
+                if not cells[index]:
+                    return -1
+                if index == goal:
+                    return index
+                if ((cells[index - 1] and not cells[index - 1 - direction]) or
+                        (cells[index + 1] and not cells[index + 1 - direction])):
+                    return index
+                # vertical runs stop wherever a horizontal jump leads somewhere
+                if jump_horizontal(index, 1) != -1 or jump_horizontal(index, -1) != -1:
+                    return index
+
+        # jump point -> (parent jump point, cost)
+        parent = {grid.start: (None, 0)}
+        flags = bytearray(len(cells))
+        self.explored = CellSet(grid, flags, EXPLORED)
+        self.num_explored = 0
 
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
+        order = count()
+        heap = [(heuristic(grid.start), heuristic(grid.start), next(order), grid.start)]
+        while heap:
+            _, _, _, index = heapq.heappop(heap)
+            if flags[index] & EXPLORED:
+                continue
+            self.num_explored += 1
+            if index == goal:
+                break
+            flags[index] |= EXPLORED
+
+            # only keep going straight and turning, never back where we came from
+            previous, cost = parent[index]
+            if previous is None:
+                directions = (-stride, stride, -1, 1)
+            elif abs(index - previous) < stride:
+                direction = 1 if index > previous else -1
+                directions = (direction, -stride, stride)
+            else:
+                direction = stride if index > previous else -stride
+                directions = (direction, -1, 1)
+
+            for direction in directions:
+                if not cells[index + direction]:
+                    continue
+                point = jump(index, direction)
+                if point == -1 or flags[point] & EXPLORED:
+                    continue
+                distance = abs(point - index)
+                point_cost = cost + (distance if direction in (1, -1) else distance // stride)
+                if point in parent and parent[point][1] <= point_cost:
+                    continue
+                parent[point] = (index, point_cost)
+                estimate = heuristic(point)
+                heapq.heappush(heap, (point_cost + estimate, estimate, next(order), point))
+        else:
+            self.elapsed = time.perf_counter() - start_time
+            raise Exception("no solution")
+
+        # Unroll the straight runs between jump points into single moves
+        names = {-stride: "up", stride: "down", -1: "left", 1: "right"}
+        actions = []
+        cells = []
+        index = goal
+        while parent[index][0] is not None:
+            previous = parent[index][0]
+            if abs(index - previous) < stride:
+                direction = 1 if index > previous else -1
+            else:
+                direction = stride if index > previous else -stride
+            while index != previous:
+                actions.append(names[direction])
+                cells.append(grid.position(index))
+                index -= direction
+        actions.reverse()
+        cells.reverse()
+        self.solution = (actions, cells)
+        self.elapsed = time.perf_counter() - start_time
+
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=50, max_size=4000):
+        """
+        Draws the maze into an image file. Cells are colored in one NumPy
+        pass and scaled up by repeating pixels, not drawn one by one.
+
+        cell_size is shrunk to keep the image within max_size pixels on
+        its longest side. If even one pixel per cell is too much, blocks of
+        cells are merged, keeping the most important color of each block.
+        """
+        import numpy as np
+        from PIL import Image
+
+        grid = self.grid
+        padded = np.frombuffer(grid.cells, dtype=np.uint8).reshape(grid.height + 2, grid.stride)
+
+        # Color index of every cell, higher indexes win when cells are merged
+        colors = np.full((self.height, self.width), EMPTY, dtype=np.uint8)
+        solved = self.solution is not None
+        if solved and show_explored:
+            flags = np.frombuffer(self.explored.flags, dtype=np.uint8)
+            flags = flags.reshape(grid.height + 2, grid.stride)[1:-1, 1:-1]
+            colors[(flags & self.explored.mask) != 0] = EXPLORED_CELL
+        colors[padded[1:-1, 1:-1] == WALL] = WALL_CELL
+        if solved and show_solution and self.solution[1]:
+            rows, cols = zip(*self.solution[1])
+            colors[list(rows), list(cols)] = SOLUTION_CELL
+        colors[self.goal] = GOAL_CELL
+        colors[self.start] = START_CELL
+
+        # Merge blocks of cells when the maze has more cells than pixels allowed
+        longest = max(self.height, self.width)
+        block = -(-longest // max_size) if max_size else 1
+        if block > 1:
+            height = -(-self.height // block) * block
+            width = -(-self.width // block) * block
+            merged = np.zeros((height, width), dtype=np.uint8)
+            merged[:self.height, :self.width] = colors
+            colors = merged.reshape(height // block, block, width // block, block).max(axis=(1, 3))
+            cell_size = 1
+        elif max_size:
+            cell_size = max(1, min(cell_size, max_size // longest))
+
+        # Scale up, leaving a black border around each cell like before
+        cell_border = cell_size // 25
+        pixels = np.repeat(np.repeat(colors, cell_size, axis=0), cell_size, axis=1)
+        if cell_border:
+            offset = np.arange(pixels.shape[0]) % cell_size
+            pixels[(offset < cell_border) | (offset > cell_size - cell_border)] = BORDER
+            offset = np.arange(pixels.shape[1]) % cell_size
+            pixels[:, (offset < cell_border) | (offset > cell_size - cell_border)] = BORDER
+
+        img = Image.fromarray(pixels, mode="P")
+        img.putpalette([channel for color in PALETTE for channel in color])
+        img.save(filename)
 
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
 
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit(f"Usage: python maze.py maze.txt [{'|'.join(STRATEGIES)}]")
 
-        img.save(filename)
+    strategy = sys.argv[2] if len(sys.argv) == 3 else "dfs"
+    if strategy not in STRATEGIES:
+        sys.exit(f"Unknown strategy, choose from: {', '.join(STRATEGIES)}")
 
+    m = Maze(sys.argv[1])
+    print("Maze:")
+    m.print()
+    print(f"Solving with {strategy}...")
+    m.solve(strategy)
+    print("States Explored:", m.num_explored)
+    print(f"Time: {m.elapsed * 1000:.2f}ms")
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True)
 
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
 
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Incremental replanning for mazes whose walls change.
+
+Replanner runs D* Lite over a Maze's grid: it searches backward from the
+goal and keeps every cell's cost-to-goal estimate between plans, so after
+walls are toggled or the start moves only the cells whose estimates the
+change invalidates are expanded again, not the whole grid.
+
+Usage: python replan.py maze.txt [changes] [--seed S]
+"""
+
+import argparse
+import heapq
+import math
+import random
+import sys
+import time
+from array import array
+
+from grid import WALL, CellSet
+from maze import EXPLORED, Maze
+
+
+class Replanner():
+
+    def __init__(self, maze):
+        """
+        Plans on maze in place: toggled walls change maze's grid, and each
+        plan sets maze.solution, num_explored, explored and elapsed like
+        Maze.solve does.
+        """
+        self.maze = maze
+        self.grid = maze.grid
+        size = len(self.grid.cells)
+        self.offsets = tuple(offset for _, offset in self.grid.moves)
+
+        # cost-to-goal estimates of every cell, and their one-step lookahead
+        self.g = array("d", [math.inf]) * size
+        self.rhs = array("d", [math.inf]) * size
+        self.rhs[self.grid.goal] = 0
+
+        # heuristic offset accumulated by moving the start, so old keys stay valid
+        self.km = 0
+        self.last = self.grid.start
+
+        # (key, cell) entries, stale ones are skipped when popped
+        self.heap = [(self.key(self.grid.goal), self.grid.goal)]
+        self.flags = bytearray(size)
+        # cells flagged by the last plan, the only ones the next plan must clear
+        self.flagged = []
+        self.num_explored = 0
+
+    def heuristic(self, a, b):
+        """Manhattan distance between two cell indexes."""
+        a_row, a_col = divmod(a, self.grid.stride)
+        b_row, b_col = divmod(b, self.grid.stride)
+        return abs(a_row - b_row) + abs(a_col - b_col)
+
+    def key(self, cell):
+        estimate = min(self.g[cell], self.rhs[cell])
+        return (estimate + self.heuristic(self.grid.start, cell) + self.km, estimate)
+
+    def lookahead(self, cell):
+        """Returns the cheapest cost to the goal through a neighbor of cell."""
+        cells = self.grid.cells
+        if cells[cell] == WALL:
+            return math.inf
+        g = self.g
+        best = math.inf
+        for offset in self.offsets:
+            neighbor = cell + offset
+            cost = cells[neighbor]
+            if cost != WALL and cost + g[neighbor] < best:
+                best = cost + g[neighbor]
+        return best
+
+    def update(self, cell):
+        if cell != self.grid.goal:
+            self.rhs[cell] = self.lookahead(cell)
+        if self.g[cell] != self.rhs[cell]:
+            heapq.heappush(self.heap, (self.key(cell), cell))
+
+    def toggle_wall(self, row, col, cost=1):
+        """
+        Turns the wall at (row, col) into an open cell of the given cost,
+        or the open cell into a wall. Returns whether it is now a wall.
+        """
+        grid = self.grid
+        if not (0 <= row < grid.height and 0 <= col < grid.width):
+            raise ValueError(f"cell {(row, col)} is outside the maze")
+        cell = grid.index(row, col)
+        if cell in (grid.start, grid.goal):
+            raise ValueError("the start and goal cannot become walls")
+        if not 1 <= cost <= 9:
+            raise ValueError("open cells cost between 1 and 9 to enter")
+
+        grid.cells[cell] = cost if grid.cells[cell] == WALL else WALL
+        # the cell's own edges and the edges into it from its neighbors changed
+        self.update(cell)
+        for offset in self.offsets:
+            self.update(cell + offset)
+        return grid.cells[cell] == WALL
+
+    def move_to(self, row, col):
+        """
+        Moves the start to (row, col), like an agent stepping along its
+        plan. Estimates toward the goal stay valid, only the keys shift.
+        """
+        grid = self.grid
+        cell = grid.index(row, col)
+        if grid.is_wall(row, col):
+            raise ValueError(f"cannot move into the wall at {(row, col)}")
+        self.km += self.heuristic(self.last, cell)
+        self.last = cell
+        grid.start = cell
+        self.maze.start = (row, col)
+
+    def plan(self):
+        """
+        Brings the estimates up to date from wherever the last plan left
+        them, then sets and returns maze.solution as (actions, cells).
+        """
+        start_time = time.perf_counter()
+        grid = self.grid
+        start = grid.start
+        g, rhs, heap, flags = self.g, self.rhs, self.heap, self.flags
+        flagged = self.flagged
+        for cell in flagged:
+            flags[cell] = 0
+        flagged.clear()
+        explored = 0
+
+        while heap and (heap[0][0] < self.key(start) or g[start] != rhs[start]):
+            old_key, cell = heapq.heappop(heap)
+            if g[cell] == rhs[cell]:
+                continue
+            new_key = self.key(cell)
+            if old_key < new_key:
+                heapq.heappush(heap, (new_key, cell))
+                continue
+
+            explored += 1
+            if not flags[cell]:
+                flags[cell] = EXPLORED
+                flagged.append(cell)
+            if g[cell] > rhs[cell]:
+                g[cell] = rhs[cell]
+            else:
+                g[cell] = math.inf
+                self.update(cell)
+            for offset in self.offsets:
+                self.update(cell + offset)
+
+        maze = self.maze
+        maze.num_explored = self.num_explored = explored
+        maze.explored = CellSet(grid, flags, EXPLORED)
+        if g[start] == math.inf:
+            maze.elapsed = time.perf_counter() - start_time
+            raise Exception("no solution")
+
+        # Follow the estimates downhill from the start to the goal
+        names = dict((offset, action) for action, offset in grid.moves)
+        cells = grid.cells
+        actions = []
+        path = []
+        cell = start
+        while cell != grid.goal:
+            cell, offset = min(
+                ((cell + offset, offset) for offset in self.offsets if cells[cell + offset] != WALL),
+                key=lambda step: cells[step[0]] + g[step[0]],
+            )
+            actions.append(names[offset])
+            path.append(grid.position(cell))
+        maze.solution = (actions, path)
+        maze.elapsed = time.perf_counter() - start_time
+        return maze.solution
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Toggle random walls and compare replanning with solving from scratch.")
+    parser.add_argument("maze")
+    parser.add_argument("changes", type=int, nargs="?", default=20)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    m = Maze(args.maze)
+    planner = Replanner(m)
+    scratch = Maze(args.maze)
+    grid = m.grid
+
+    def report(label):
+        try:
+            planner.plan()
+            length = len(m.solution[0])
+        except Exception as e:
+            if str(e) != "no solution":
+                raise
+            length = None
+        try:
+            scratch.solve("dijkstra")
+            expected = len(scratch.solution[0])
+        except Exception:
+            expected = None
+        print(f"{label}: length {length}, replanned {m.num_explored} cells in {m.elapsed:.4f}s, "
+              f"dijkstra explored {scratch.num_explored} in {scratch.elapsed:.4f}s")
+        if length is None and expected is not None:
+            sys.exit("replanning found no solution where dijkstra did")
+
+    report("initial")
+    for change in range(args.changes):
+        while True:
+            row, col = rng.randrange(m.height), rng.randrange(m.width)
+            if grid.index(row, col) not in (grid.start, grid.goal):
+                break
+        wall = planner.toggle_wall(row, col)
+        scratch.grid.cells[scratch.grid.index(row, col)] = grid.cells[grid.index(row, col)]
+        report(f"{'closed' if wall else 'opened'} {(row, col)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Bitboard Tic Tac Toe engine.
+
+Each side's marks are a 9-bit integer where bit row * 3 + column is set
+for every cell the side holds. A move is a single OR, the side to move
+is the parity of the number of marks, and a side has won when its marks
+cover one of the 8 line masks, looked up in a precomputed table.
+
+The functions named like those of tictactoe.py take and return the same
+list of lists boards, so `import bitboard as ttt` works in runner.py.
+"""
+
+from tictactoe import EMPTY, O, X
+
+
+FULL = 0b111_111_111
+
+# Cells of each row, column and diagonal
+LINES = (
+    0b000_000_111, 0b000_111_000, 0b111_000_000,
+    0b001_001_001, 0b010_010_010, 0b100_100_100,
+    0b100_010_001, 0b001_010_100,
+)
+
+# Number of marks, and whether they complete a line, for every 9-bit set of cells
+POPCOUNT = bytes(bin(marks).count("1") for marks in range(FULL + 1))
+WINS = bytes(any(marks & line == line for line in LINES) for marks in range(FULL + 1))
+
+# Cells to try first when searching: the center, the corners, then the edges
+ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# Value of every position searched so far for the side to move, by (mine, theirs)
+values = {}
+
+# Number of positions searched by the last call to best_cell
+nodes = 0
+
+
+def to_move(x, o):
+    """Returns X or O, whichever plays next."""
+    return X if POPCOUNT[x | o] % 2 == 0 else O
+
+
+def free_cells(x, o):
+    """Returns the indexes of the empty cells, in search order."""
+    taken = x | o
+    return [cell for cell in ORDER if not taken >> cell & 1]
+
+
+def play(x, o, cell):
+    """Returns (x, o) after the side to move marks cell."""
+    if POPCOUNT[x | o] % 2 == 0:
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def line_owner(x, o):
+    """Returns X or O if that side has completed a line, otherwise None."""
+    if WINS[x]:
+        return X
+    if WINS[o]:
+        return O
+    return None
+
+
+def game_over(x, o):
+    return bool(WINS[x] or WINS[o]) or x | o == FULL
+
+
+def score(x, o):
+    """Returns 1 if X has won, -1 if O has won, 0 otherwise."""
+    return WINS[x] - WINS[o]
+
+
+def negamax(mine, theirs):
+    """
+    Returns the value of the position for the side to move, holding mine,
+    1 for a win, -1 for a loss and 0 for a draw. Memoized in values.
+    """
+    global nodes
+    key = (mine, theirs)
+    if key in values:
+        return values[key]
+    nodes += 1
+
+    if WINS[theirs]:
+        v = -1
+    elif mine | theirs == FULL:
+        v = 0
+    else:
+        v = -1
+        taken = mine | theirs
+        for cell in ORDER:
+            if taken >> cell & 1:
+                continue
+            v = max(v, -negamax(theirs, mine | 1 << cell))
+            if v == 1:
+                break
+    values[key] = v
+    return v
+
+
+def best_cell(x, o):
+    """
+    Returns the cell the side to move should mark, None when the game is over.
+    """
+    global nodes
+    nodes = 0
+    if game_over(x, o):
+        return None
+    mine, theirs = (x, o) if to_move(x, o) == X else (o, x)
+    best = None
+    for cell in free_cells(x, o):
+        v = -negamax(theirs, mine | 1 << cell)
+        if best is None or v > best[0]:
+            best = (v, cell)
+            if v == 1:
+                break
+    return best[1]
+
+
+def to_bits(board):
+    """Returns the (x, o) bitboards of a list of lists board."""
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (i * 3 + j)
+            elif cell == O:
+                o |= 1 << (i * 3 + j)
+    return x, o
+
+
+def to_board(x, o):
+    """Returns the list of lists board of (x, o) bitboards."""
+    return [[X if x >> (i * 3 + j) & 1 else O if o >> (i * 3 + j) & 1 else EMPTY
+             for j in range(3)]
+            for i in range(3)]
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return to_board(0, 0)
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return to_move(*to_bits(board))
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    return {divmod(cell, 3) for cell in free_cells(*to_bits(board))}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    i, j = action
+    if i < 0 or j < 0 or i >= 3 or j >= 3:
+        raise Exception("out of boundery")
+
+    x, o = to_bits(board)
+    if (x | o) >> (i * 3 + j) & 1:
+        raise Exception("cell is not empty")
+    return to_board(*play(x, o, i * 3 + j))
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    return line_owner(*to_bits(board))
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return game_over(*to_bits(board))
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    return score(*to_bits(board))
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    cell = best_cell(*to_bits(board))
+    if cell is None:
+        return None
+    return divmod(cell, 3)
@@ -0,0 +1,110 @@
+"""
+Perfect-play opening book for Tic Tac Toe.
+
+Every position reachable from the empty board is solved once and the
+best cell for the side to move is stored in a table of one byte per
+base 3 board encoding, 3 ** 9 bytes in all, so looking a position up is
+a single index. tictactoe.minimax consults the book before searching.
+
+Usage: python book.py [filename]
+"""
+
+import os
+import sys
+import time
+
+import bitboard
+
+
+FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe.book")
+MAGIC = b"TTTBOOK1"
+
+# Table byte of positions that are over, or cannot be reached
+NONE = 255
+
+# Powers of 3 of each cell, to encode a board as a table index
+POWERS = tuple(3 ** cell for cell in range(9))
+SIZE = 3 ** 9
+
+# Table loaded by lookup, None until the first lookup, b"" if there is no book
+table = None
+
+
+def position(x, o):
+    """Returns the table index of (x, o) bitboards, X is digit 1 and O digit 2."""
+    return sum(POWERS[cell] * (x >> cell & 1 | (o >> cell & 1) << 1) for cell in range(9))
+
+
+def build():
+    """
+    Returns the table of best cells of every position reachable from
+    the empty board, found by walking the whole game tree once.
+    """
+    cells = bytearray([NONE]) * SIZE
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in seen:
+            continue
+        seen.add((x, o))
+        if bitboard.game_over(x, o):
+            continue
+        cells[position(x, o)] = bitboard.best_cell(x, o)
+        for cell in bitboard.free_cells(x, o):
+            stack.append(bitboard.play(x, o, cell))
+    return bytes(cells)
+
+
+def save(cells, filename=FILENAME):
+    partial = filename + ".partial"
+    with open(partial, "wb") as f:
+        f.write(MAGIC)
+        f.write(cells)
+    os.replace(partial, filename)
+
+
+def load(filename=FILENAME):
+    """
+    Returns the table of filename, or None if there is none or it is not a book.
+    """
+    try:
+        with open(filename, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) != len(MAGIC) + SIZE or not data.startswith(MAGIC):
+        return None
+    return data[len(MAGIC):]
+
+
+def lookup(board):
+    """
+    Returns the best action (i, j) on board, or None if the book has no
+    move for it or there is no book. The book is loaded on first use.
+    """
+    global table
+    if table is None:
+        table = load() or b""
+    if not table:
+        return None
+    cell = table[position(*bitboard.to_bits(board))]
+    if cell == NONE:
+        return None
+    return divmod(cell, 3)
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [filename]")
+    filename = sys.argv[1] if len(sys.argv) == 2 else FILENAME
+
+    start = time.perf_counter()
+    cells = build()
+    save(cells, filename)
+    positions = sum(cell != NONE for cell in cells)
+    print(f"Solved {positions} positions into {filename} in {time.perf_counter() - start:.2f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+m,n,k-game engine: Tic Tac Toe on an m x n board, won by k in a row.
+
+Exhaustive minimax is hopeless beyond 3 x 3, so the engine searches with
+iterative deepening under a time budget and scores the positions where
+it stops with an evaluation function. Every window of k cells in a row,
+column or diagonal keeps a count of each side's marks, updated in place
+by every move and undo, so the evaluation, the threats (windows one mark
+from complete) and the winner are known without rescanning the board.
+
+Usage: python mnk.py [m n k] [--time SECONDS] [--depth D]
+"""
+
+import argparse
+import random
+import time
+
+from tictactoe import EMPTY, O, X
+
+
+# Score of a won position, minus the plies it took, so faster wins score higher
+WIN = 1_000_000_000
+
+# Bounds of a transposition table value, like tictactoe.py
+EXACT, LOWER, UPPER = range(3)
+
+
+class Timeout(Exception):
+    """Raised inside a search once its time budget is spent."""
+
+
+class Game():
+
+    def __init__(self, m=7, n=7, k=4, reach=2, seed=0):
+        """
+        An empty m row by n column board won by k in a row. Searches only
+        try cells within reach of a mark already on the board, unless they
+        are deep enough to play the game out.
+        """
+        if not 2 <= k <= max(m, n):
+            raise ValueError(f"no line of {k} fits on a {m} x {n} board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.size = m * n
+        self.reach = reach
+
+        # cells of every k-long row, column and diagonal window
+        self.windows = []
+        for r in range(m):
+            for c in range(n):
+                for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                    if 0 <= end_r < m and 0 <= end_c < n:
+                        self.windows.append(tuple((r + dr * i) * n + c + dc * i for i in range(k)))
+        # indexes of the windows through each cell
+        self.cell_windows = [[] for _ in range(self.size)]
+        for w, window in enumerate(self.windows):
+            for cell in window:
+                self.cell_windows[cell].append(w)
+        # cells within reach of each cell, itself included
+        self.nearby = [
+            [rr * n + cc
+             for rr in range(max(0, r - reach), min(m, r + reach + 1))
+             for cc in range(max(0, c - reach), min(n, c + reach + 1))]
+            for r in range(m) for c in range(n)
+        ]
+
+        # value of a window holding only one side's marks, by how many it holds
+        self.weights = [0] + [4 ** count for count in range(1, k)] + [0]
+
+        # random keys of each (cell, side), xor-ed into an incremental position hash
+        rng = random.Random(seed)
+        self.keys = {X: [rng.getrandbits(64) for _ in range(self.size)],
+                     O: [rng.getrandbits(64) for _ in range(self.size)]}
+
+        self.cells = [EMPTY] * self.size
+        self.counts = {X: [0] * len(self.windows), O: [0] * len(self.windows)}
+        # windows each side could complete with one more mark
+        self.threats = {X: 0, O: 0}
+        # number of marks within reach of each cell
+        self.near = [0] * self.size
+        self.moves = []
+        self.hash = 0
+        # completed windows of each side
+        self.lines = {X: 0, O: 0}
+        # evaluation from X's side, the sum of every window's value
+        self.score = 0
+
+        self.transpositions = {}
+        self.history = [0] * self.size
+        self.nodes = 0
+
+    @classmethod
+    def from_board(cls, board, k=None, **options):
+        """
+        Returns the game of a tictactoe.py style list of lists board,
+        won by k in a row. k may only be left out for 3 x 3 boards.
+        """
+        m, n = len(board), len(board[0])
+        if k is None:
+            if (m, n) != (3, 3):
+                raise ValueError(f"give k, the line length that wins on a {m} x {n} board")
+            k = 3
+        game = cls(m, n, k, **options)
+        xs = [i * n + j for i in range(m) for j in range(n) if board[i][j] == X]
+        os = [i * n + j for i in range(m) for j in range(n) if board[i][j] == O]
+        if not 0 <= len(xs) - len(os) <= 1:
+            raise ValueError("X moves first and the players alternate")
+        for turn in range(len(xs) + len(os)):
+            game.play(xs[turn // 2] if turn % 2 == 0 else os[turn // 2])
+        return game
+
+    @property
+    def winner(self):
+        """Returns X or O if that side has k in a row, otherwise None."""
+        if self.lines[X]:
+            return X
+        if self.lines[O]:
+            return O
+        return None
+
+    def player(self):
+        """Returns X or O, whichever plays next."""
+        return X if len(self.moves) % 2 == 0 else O
+
+    def terminal(self):
+        return self.winner is not None or len(self.moves) == self.size
+
+    def _value(self, mine, theirs):
+        # value of a window for its side, from X's side when X is mine
+        if theirs == 0:
+            return self.weights[mine]
+        if mine == 0:
+            return -self.weights[theirs]
+        return 0
+
+    def play(self, cell):
+        """Marks cell for the side to move."""
+        if self.cells[cell] is not EMPTY:
+            raise Exception("cell is not empty")
+        side = self.player()
+        other = O if side == X else X
+        sign = 1 if side == X else -1
+        mine, theirs = self.counts[side], self.counts[other]
+        k = self.k
+
+        for w in self.cell_windows[cell]:
+            before = self._value(mine[w], theirs[w])
+            mine[w] += 1
+            self.score += sign * (self._value(mine[w], theirs[w]) - before)
+            if theirs[w] == 0:
+                if mine[w] == k - 1:
+                    self.threats[side] += 1
+                elif mine[w] == k:
+                    # a threat made good
+                    self.threats[side] -= 1
+                    self.lines[side] += 1
+            elif mine[w] == 1 and theirs[w] == k - 1:
+                # this mark blocks the other side's threat
+                self.threats[other] -= 1
+
+        for near in self.nearby[cell]:
+            self.near[near] += 1
+        self.cells[cell] = side
+        self.hash ^= self.keys[side][cell]
+        self.moves.append(cell)
+
+    def undo(self):
+        """Takes back the last move."""
+        cell = self.moves.pop()
+        side = self.cells[cell]
+        other = O if side == X else X
+        sign = 1 if side == X else -1
+        mine, theirs = self.counts[side], self.counts[other]
+        k = self.k
+
+        for w in self.cell_windows[cell]:
+            before = self._value(mine[w], theirs[w])
+            if theirs[w] == 0:
+                if mine[w] == k:
+                    self.threats[side] += 1
+                    self.lines[side] -= 1
+                elif mine[w] == k - 1:
+                    self.threats[side] -= 1
+            elif mine[w] == 1 and theirs[w] == k - 1:
+                self.threats[other] += 1
+            mine[w] -= 1
+            self.score += sign * (self._value(mine[w], theirs[w]) - before)
+
+        for near in self.nearby[cell]:
+            self.near[near] -= 1
+        self.cells[cell] = EMPTY
+        self.hash ^= self.keys[side][cell]
+
+    def candidates(self, depth=0):
+        """
+        Returns the empty cells worth trying, near the marks on the board,
+        or every empty cell if depth plies reach the end of the game.
+        """
+        if not self.moves:
+            return [(self.m // 2) * self.n + self.n // 2]
+        cells, near = self.cells, self.near
+        if depth >= self.size - len(self.moves):
+            return [cell for cell in range(self.size) if cells[cell] is EMPTY]
+        return [cell for cell in range(self.size) if near[cell] and cells[cell] is EMPTY]
+
+    def evaluate(self):
+        """Returns the evaluation from the side to move's point of view."""
+        side = self.player()
+        if self.threats[side]:
+            # a line can be completed right away
+            return WIN - len(self.moves) - 1
+        return self.score if side == X else -self.score
+
+    def best_move(self, time_limit=1.0, max_depth=None):
+        """
+        Returns the (row, col) to play, searching one ply deeper at a time
+        until time_limit seconds are spent or max_depth is reached. The
+        move of the deepest search that finished is played.
+        """
+        if self.terminal():
+            return None
+        self.deadline = time.perf_counter() + time_limit if time_limit else None
+        self.nodes = 0
+        remaining = self.size - len(self.moves)
+        max_depth = min(max_depth or remaining, remaining)
+
+        moves = self.candidates()
+        best = moves[0]
+        self.depth = 0
+        self.value = None
+        if len(moves) == 1:
+            return divmod(best, self.n)
+        for depth in range(1, max_depth + 1):
+            try:
+                v, move = self._root(depth, self.candidates(depth), best)
+            except Timeout:
+                break
+            best = move
+            self.depth = depth
+            self.value = v
+            if v >= WIN - self.size:
+                # a forced win, deeper searches cannot improve on it. A
+                # proven loss keeps deepening to find the longest defence.
+                break
+        return divmod(best, self.n)
+
+    def _root(self, depth, moves, first):
+        moves = [first] + [move for move in moves if move != first]
+        alpha, beta = -WIN - 1, WIN + 1
+        best = None
+        lost = -(WIN - self.size)
+        for move in moves:
+            self.play(move)
+            try:
+                v = -self._negamax(depth - 1, -beta, -alpha, 1)
+                # threats left to the other side, to rank equally lost moves
+                threats = self.threats[self.player()]
+            finally:
+                self.undo()
+            if best is None or v > best[0] or (v == best[0] <= lost and threats < best[2]):
+                best = (v, move, threats)
+                # a proven loss keeps alpha below it, so that equally lost
+                # moves come back exact and the one that blocks can be told apart
+                alpha = max(alpha, v - 1 if v <= lost else v)
+        return best[:2]
+
+    def _negamax(self, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & 1023 == 0 and time.perf_counter() > self.deadline:
+            raise Timeout()
+
+        if self.winner is not None:
+            # the last move won
+            return -(WIN - len(self.moves))
+        if len(self.moves) == self.size:
+            return 0
+        if depth == 0:
+            return self.evaluate()
+
+        original_alpha = alpha
+        entry = self.transpositions.get(self.hash)
+        best_first = None
+        if entry is not None:
+            entry_depth, v, bound, best_first = entry
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return v
+                if bound == LOWER:
+                    alpha = max(alpha, v)
+                else:
+                    beta = min(beta, v)
+                if alpha >= beta:
+                    return v
+
+        # the table's best move first, then cells that caused cutoffs before
+        history = self.history
+        moves = sorted(self.candidates(depth), key=lambda cell: (cell != best_first, -history[cell]))
+        best = (-WIN - 1, None)
+        for move in moves:
+            self.play(move)
+            try:
+                v = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                self.undo()
+            if v > best[0]:
+                best = (v, move)
+                if v > alpha:
+                    alpha = v
+                    if alpha >= beta:
+                        history[move] += depth * depth
+                        break
+
+        v = best[0]
+        if v <= original_alpha:
+            bound = UPPER
+        elif v >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.transpositions[self.hash] = (depth, v, bound, best[1])
+        return v
+
+    def __str__(self):
+        return "\n".join(
+            " ".join(self.cells[r * self.n + c] or "." for c in range(self.n))
+            for r in range(self.m)
+        )
+
+
+def minimax(board, k=None, time_limit=1.0):
+    """
+    Returns the action (i, j) for the current player on a list of lists
+    board of any size, won by k in a row, within about time_limit seconds.
+    """
+    return Game.from_board(board, k).best_move(time_limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch the engine play itself at m,n,k.")
+    parser.add_argument("size", type=int, nargs="*", default=[7, 7, 4], metavar="m n k")
+    parser.add_argument("--time", type=float, default=1.0, help="seconds per move")
+    parser.add_argument("--depth", type=int, help="deepest search per move")
+    args = parser.parse_args()
+    if len(args.size) != 3:
+        parser.error("give all of m, n and k")
+
+    game = Game(*args.size)
+    while not game.terminal():
+        side = game.player()
+        start = time.perf_counter()
+        row, col = game.best_move(args.time, args.depth)
+        elapsed = time.perf_counter() - start
+        game.play(row * game.n + col)
+        print(f"{side} plays {(row, col)}: depth {game.depth}, {game.nodes} nodes in {elapsed:.2f}s")
+    print(game)
+    print(f"Winner: {game.winner}" if game.winner else "Draw")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,53 @@ Tic Tac Toe Player
 """
 
 import math
-from copy import deepcopy
 
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Base 3 digit of each cell value in a board encoding
+DIGITS = {EMPTY: 0, X: 1, O: 2}
+
+# The 8 rotations and reflections of the board, each as the flat cell
+# index, row * 3 + column, that lands on every cell of the transformed board
+SYMMETRIES = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),  # identity
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),  # rotate 90
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),  # rotate 180
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),  # rotate 270
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),  # mirror left-right
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),  # mirror top-bottom
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),  # main diagonal
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),  # anti diagonal
+)
+
+# Whether positions that are rotations or reflections of each other
+# share one transposition table entry
+use_symmetry = True
+
+# Whether a transposition table value is exact, or only a lower or
+# upper bound because the search that found it was cut off
+EXACT, LOWER, UPPER = range(3)
+
+# (value, EXACT, LOWER or UPPER) of every position searched so far, by
+# encode(board). Kept for the life of the process, so each position is
+# searched about once.
+transpositions = {}
+
+# Static move ordering, center first, then the corners, then the edges
+PRIORITY = {
+    (i, j): 0 if (i, j) == (1, 1) else 1 if i != 1 and j != 1 else 2
+    for i in range(3) for j in range(3)
+}
+
+# Last move at each ply, by number of marks on the board, that cut off the search
+killers = [None] * 10
+
+# Number of positions searched by the last call to minimax
+nodes = 0
+
 
 def initial_state():
     """
@@ -62,7 +102,7 @@ def result(board, action):
     if board[i][j] != EMPTY:
         raise Exception("cell is not empty")
 
-    copy_board = deepcopy(board)
+    copy_board = [row[:] for row in board]
     copy_board[i][j] = player(board)
     return copy_board
 
@@ -121,38 +161,109 @@ def utility(board):
 inf = float("inf")
 
 
-def max_value(board):
+def encode(board):
+    """
+    Returns a hashable key of the board, as a base 3 integer. With
+    use_symmetry, the smallest key over the 8 symmetric boards, so
+    equivalent positions share a key.
+    """
+    cells = [DIGITS[cell] for row in board for cell in row]
+    if not use_symmetry:
+        return sum(digit * 3 ** k for k, digit in enumerate(cells))
+    return min(
+        sum(cells[index] * 3 ** k for k, index in enumerate(symmetry))
+        for symmetry in SYMMETRIES
+    )
+
+
+def value(board, alpha=-inf, beta=inf):
+    """
+    Returns the minimax value of the board if it lies between alpha and
+    beta, otherwise a bound past whichever of them it is beyond.
+
+    Results are kept in the transposition table with whether they are
+    exact or only a bound, and reused when the position, or with
+    use_symmetry one equivalent to it, is reached again.
+    """
+    key = encode(board)
+    if key in transpositions:
+        v, bound = transpositions[key]
+        if bound == EXACT:
+            return v
+        if bound == LOWER:
+            alpha = max(alpha, v)
+        else:
+            beta = min(beta, v)
+        if alpha >= beta:
+            return v
+
+    if player(board) == X:
+        v = max_value(board, alpha, beta)[0]
+    else:
+        v = min_value(board, alpha, beta)[0]
+
+    if v <= alpha:
+        transpositions[key] = (v, UPPER)
+    elif v >= beta:
+        transpositions[key] = (v, LOWER)
+    else:
+        transpositions[key] = (v, EXACT)
+    return v
+
+
+def ordered_actions(board):
+    """
+    Returns the possible actions in the order they are most likely to
+    cut off the search: the killer move of this ply first, then the
+    center, the corners and the edges.
+    """
+    ply = 9 - sum(row.count(EMPTY) for row in board)
+    killer = killers[ply]
+    return sorted(actions(board), key=lambda action: (action != killer, PRIORITY[action]))
+
+
+def max_value(board, alpha=-inf, beta=inf):
+    global nodes
+    nodes += 1
     if terminal(board):
         return utility(board), tuple()
 
     v = -inf
     pos = tuple()
-    for i, j in actions(board):
-        next_val = min_value(result(board, (i, j)))[0]
+    moves = ordered_actions(board)
+    for i, j in moves:
+        next_val = value(result(board, (i, j)), max(alpha, v), beta)
         # v = max(v, next_val)
         if next_val > v:
             v = next_val
             pos = (i, j)
-            if v == 1:
-                break  # maximum value that can be achive
+            if v == 1 or v >= beta:
+                # maximum value that can be achive, or more than min would allow
+                killers[9 - len(moves)] = pos
+                break
 
     return v, pos
 
 
-def min_value(board):
+def min_value(board, alpha=-inf, beta=inf):
+    global nodes
+    nodes += 1
     if terminal(board):
         return utility(board), tuple()
 
     v = inf
     pos = tuple()
-    for i, j in actions(board):
-        next_val = max_value(result(board, (i, j)))[0]
+    moves = ordered_actions(board)
+    for i, j in moves:
+        next_val = value(result(board, (i, j)), alpha, min(beta, v))
         # v = min(v, next_val)
         if next_val < v:
             v = next_val
             pos = (i, j)
-            if v == -1:
-                break  # minimum value that can be achive
+            if v == -1 or v <= alpha:
+                # minimum value that can be achive, or less than max would allow
+                killers[9 - len(moves)] = pos
+                break
 
     return v, pos
 
@@ -160,10 +271,23 @@ def min_value(board):
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
+    Positions in the opening book, built by book.py, are answered in
+    constant time. Otherwise positions are memoized in transpositions
+    across calls, so after the first search every move mostly looks up
+    the values of its successors. nodes counts the positions the call
+    searched.
     """
+    global nodes
+    nodes = 0
     if terminal(board):
         return
 
+    # imported here, the book's engine imports this module
+    import book
+    move = book.lookup(board)
+    if move is not None:
+        return move
+
     if player(board) == X:  # max function
         return max_value(board)[1]
     else:  # min function
@@ -174,5 +298,5 @@ if __name__ == "__main__":
     board = initial_state()
     board[0][0] = X
     # print(min_value(board))
-    print(minimax(board))
+    print(minimax(board), f"({nodes} positions searched)")
     # print(actions(board))